@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:52
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Upper('username'), name='accounts_user_username_upper'),
+        ),
+    ]
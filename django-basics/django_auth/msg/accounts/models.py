@@ -4,6 +4,7 @@ from django.contrib.auth.models import (
     PermissionsMixin, # Provides for user group permissions, etc.
 )
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils import timezone
 
 
@@ -74,3 +75,15 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     def get_long_name(self):
         return '{} (@{})'.format(self.display_name, self.username)
+
+    class Meta:
+        indexes = [
+            # Users are looked up with `username__iexact` (e.g., on their
+            # timelines), which compares `UPPER(username)` on databases such
+            # as PostgreSQL. The `unique` index on `username` can't be used
+            # for that, but this one can.
+            models.Index(
+                Upper('username'),
+                name='accounts_user_username_upper',
+            ),
+        ]
@@ -1,6 +1,6 @@
 from django.conf import settings
 from django.urls import reverse
-from django.db import models
+from django.db import models, transaction
 from django.utils.text import slugify
 
 import misaka
@@ -71,6 +71,26 @@ class CommunityMember(models.Model):
             self.community.name
         )
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Banned members stop seeing the community's posts in their
+            # home feed.
+            if self.role == 0:
+                self.remove_feed_items()
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            self.remove_feed_items()
+            return super().delete(*args, **kwargs)
+
+    def remove_feed_items(self):
+        # Uses the reverse relation from `posts.models.FeedItem`, since the
+        # `posts` app imports this module.
+        self.user.feed_items.filter(
+            post__community_id=self.community_id
+        ).delete()
+
     class Meta:
         # When you add a new permission, you are adding it to the
         # `permissions` table, which requires a new migration.
@@ -5,6 +5,29 @@ from .. import models
 register = template.Library()
 
 
+def get_memberships(context):
+    """
+    Returns the signed-in user's memberships, with their communities. They
+    are fetched once per request and cached on the request, so that every
+    tag below shares one query, however many times the tags are used.
+    """
+    user = context["user"]
+    if not user.is_authenticated:
+        return []
+    request = context.get("request")
+    memberships = getattr(request, "_community_memberships", None)
+    if memberships is None:
+        memberships = list(user.communities.select_related("community"))
+        if request is not None:
+            request._community_memberships = memberships
+    return memberships
+
+
+def get_community_ids(context):
+    return {membership.community_id
+            for membership in get_memberships(context)}
+
+
 @register.simple_tag
 def get_all_communities():
     return models.Community.objects.all()
@@ -12,23 +35,18 @@ def get_all_communities():
 
 @register.simple_tag(takes_context=True)
 def get_user_communities(context):
-    return context["user"].communities.select_related("community").all()
+    return get_memberships(context)
 
 
 @register.simple_tag(takes_context=True)
 def get_other_communities(context):
-    if context["user"].is_authenticated:
-        return models.Community.objects.exclude(
-            pk__in=context["user"].communities.select_related(
-                "community").values_list("community")
-        )
-    return models.Community.objects.all()
+    return models.Community.objects.exclude(pk__in=get_community_ids(context))
 
 
 @register.inclusion_tag("communities/_buttons.html", takes_context=True)
 def community_buttons(context, community):
-    user = context["user"]
-    response = {"community": community, "in_community": False}
-    if user in community.members.all():
-        response["in_community"] = True
-    return response
+    # A set lookup, rather than loading every member of the community.
+    return {
+        "community": community,
+        "in_community": community.pk in get_community_ids(context),
+    }
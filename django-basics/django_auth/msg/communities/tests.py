@@ -1,3 +1,96 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.urls import reverse
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from posts.models import Post
+
+from . import models
+
+
+class SingleCommunityTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(
+            username="kennethlove", email="kenneth@teamtreehouse.com")
+        self.community = models.Community.objects.create(name="Django")
+
+    def test_posts_are_paged(self):
+        for number in range(25):
+            Post.objects.create(user=self.user, community=self.community,
+                                message="Post {}".format(number))
+        resp = self.client.get(self.community.get_absolute_url())
+        self.assertEqual(len(resp.context["post_list"]), 20)
+        self.assertContains(resp, "Older posts")
+
+        resp = self.client.get(self.community.get_absolute_url(),
+                               {"before": resp.context["next_cursor"]})
+        self.assertEqual(len(resp.context["post_list"]), 5)
+        self.assertIsNone(resp.context["next_cursor"])
+
+    def add_members(self, count, start=0):
+        for number in range(start, start + count):
+            models.CommunityMember.objects.create(
+                community=self.community,
+                user=get_user_model().objects.create(
+                    username="member{}".format(number),
+                    email="member{}@example.com".format(number),
+                ),
+                role=1 + number % 2,
+            )
+
+    def get_as_admin(self):
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(self.community.get_absolute_url())
+        return resp, len(queries)
+
+    def test_member_list_queries(self):
+        models.CommunityMember.objects.create(
+            community=self.community, user=self.user, role=3)
+        self.client.force_login(self.user)
+        self.add_members(2)
+        resp, few_members_queries = self.get_as_admin()
+        self.assertTrue(resp.context["can_manage_members"])
+        # A member can be upgraded, and a moderator downgraded.
+        self.assertContains(resp, "glyphicon-thumbs-up", count=1)
+        self.assertContains(resp, "glyphicon-thumbs-down", count=1)
+
+        self.add_members(30, start=2)
+        resp, many_members_queries = self.get_as_admin()
+        self.assertEqual(len(resp.context["members"]), 33)
+        self.assertEqual(few_members_queries, many_members_queries)
+
+    def test_buttons(self):
+        self.client.force_login(self.user)
+        resp = self.client.get(self.community.get_absolute_url())
+        self.assertContains(resp, "Join")
+
+        models.CommunityMember.objects.create(
+            community=self.community, user=self.user)
+        resp = self.client.get(self.community.get_absolute_url())
+        self.assertContains(resp, "Leave")
+
+
+class CommunityTagsTests(TestCase):
+    def test_memberships_are_fetched_once(self):
+        user = get_user_model().objects.create(
+            username="kennethlove", email="kenneth@teamtreehouse.com")
+        for name in ["Django", "Flask", "Python"]:
+            community = models.Community.objects.create(name=name)
+            if name != "Flask":
+                models.CommunityMember.objects.create(
+                    community=community, user=user)
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(reverse("posts:all"))
+        # Both sidebar lists come from a single query for the memberships.
+        self.assertEqual(len([
+            query for query in queries
+            if query["sql"].startswith('SELECT "communities_communitymember"')
+        ]), 1)
+        # Each community is linked once, from one of the two lists.
+        for slug in ["django", "flask", "python"]:
+            self.assertContains(resp, 'href="/communities/posts/in/{}/"'.format(
+                slug), count=1)
+        yours, others = resp.content.decode().split("All Communities")
+        self.assertIn("/communities/posts/in/flask/", others)
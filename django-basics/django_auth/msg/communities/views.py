@@ -9,7 +9,7 @@ from django.db import IntegrityError
 from django.shortcuts import get_object_or_404
 from django.views import generic
 
-from braces.views import PrefetchRelatedMixin
+from posts.pagination import keyset_page
 
 from . import models
 
@@ -28,9 +28,36 @@ class CreateCommunity(LoginRequiredMixin, generic.CreateView):
         return resp
 
 
-class SingleCommunity(PrefetchRelatedMixin, generic.DetailView):
+class SingleCommunity(generic.DetailView):
     model = models.Community
-    prefetch_related = ("members",)
+    # Number of posts per page.
+    paginate_by = 20
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Members who aren't banned, with their users joined in. The
+        # template reads each member's role from `membership.role`, rather
+        # than querying `community.admins` and `community.moderators` for
+        # each member it lists.
+        context["members"] = self.object.good_members.select_related(
+            "user"
+        ).order_by("pk")
+        # Admins and moderators can change the status of other members.
+        # Only the signed-in user's own role is needed for that.
+        context["can_manage_members"] = (
+            self.request.user.is_authenticated
+            and self.object.memberships.filter(
+                user=self.request.user, role__in=(2, 3)
+            ).exists()
+        )
+        # Page through the community's posts on its `(community, created_at)`
+        # index, with `?before=` as in `posts.views.AllPosts`.
+        context["post_list"], context["next_cursor"] = keyset_page(
+            self.object.posts.select_related("user", "community"),
+            self.request.GET.get("before"),
+            self.paginate_by,
+        )
+        return context
 
 
 class AllCommunities(generic.ListView):
@@ -146,3 +146,6 @@ AUTH_USER_MODEL = 'accounts.User'
 INTERNAL_IPS = ['127.0.0.1', '::1', '0.0.0.0'] # '::1' for IPv6
 
 DEBUG_TOOLBAR_PATCH_SETTINGS = False
+
+# Number of items kept in each user's home feed (see `posts.models.FeedItem`).
+POSTS_FEED_SIZE = 500
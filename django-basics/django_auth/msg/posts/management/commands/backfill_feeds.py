@@ -0,0 +1,46 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from communities.models import CommunityMember
+from posts import models
+
+
+class Command(BaseCommand):
+    help = ('Fills the home feeds of users with the newest posts from the '
+            'communities they belong to (e.g., after the feed table was '
+            'added, or after users joined new communities).')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', dest='usernames', action='append', default=[],
+            help='Only backfill the feed of this username (repeatable).',
+        )
+
+    def handle(self, *args, **options):
+        feed_size = models.get_feed_size()
+        users = get_user_model().objects.filter(
+            communities__role__gt=0
+        ).distinct().order_by('pk')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+
+        created = 0
+        for user_id in users.values_list('pk', flat=True).iterator():
+            community_ids = CommunityMember.objects.filter(
+                user_id=user_id, role__gt=0
+            ).values('community_id')
+            # Only the newest `POSTS_FEED_SIZE` posts could survive pruning.
+            posts = models.Post.objects.filter(
+                community_id__in=community_ids
+            ).order_by('-created_at', '-id').values_list(
+                'pk', 'created_at'
+            )[:feed_size]
+            with transaction.atomic():
+                created += len(models.FeedItem.objects.bulk_create([
+                    models.FeedItem(user_id=user_id, post_id=post_id,
+                                    created_at=created_at)
+                    for post_id, created_at in posts
+                ], ignore_conflicts=True))
+                models.FeedItem.objects.prune([user_id])
+        self.stdout.write('Backfilled feeds with {} item(s).'.format(created))
@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.urls import reverse
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import RowNumber
 
 import misaka
 
@@ -29,7 +30,13 @@ class Post(models.Model):
 
     def save(self, *args, **kwargs):
         self.message_html = misaka.html(self.message)
-        super().save(*args, **kwargs)
+        # Only new posts are copied into feeds. `_state.adding` is `True`
+        # until the row has been inserted.
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding and self.community_id:
+                FeedItem.objects.fan_out(self)
 
     def get_absolute_url(self):
         return reverse(
@@ -43,3 +50,96 @@ class Post(models.Model):
     class Meta:
         ordering = ["-created_at"]
         unique_together = ["user", "message"]
+        # Support the keyset pagination in `pagination.py` for all posts,
+        # a user's posts and a community's posts.
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="posts_post_created_idx",
+            ),
+            models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="posts_post_user_created_idx",
+            ),
+            models.Index(
+                fields=["community", "-created_at", "-id"],
+                name="posts_post_community_idx",
+            ),
+        ]
+
+
+def get_feed_size():
+    # Number of items kept in each user's feed.
+    return getattr(settings, 'POSTS_FEED_SIZE', 500)
+
+
+class FeedItemQuerySet(models.QuerySet):
+    def fan_out(self, post):
+        """
+        Copies `post` into the feed of every member of its community (other
+        than banned members), then prunes those feeds. This is "fan-out on
+        write": posting costs one row per member, but reading a home feed is
+        a single range read on the `(user, created_at)` index, however many
+        communities the user belongs to.
+        """
+        user_ids = list(post.community.memberships.exclude(
+            role=0
+        ).values_list('user_id', flat=True))
+        self.bulk_create([
+            FeedItem(user_id=user_id, post=post, created_at=post.created_at)
+            for user_id in user_ids
+        ], ignore_conflicts=True)
+        self.prune(user_ids)
+
+    def prune(self, user_ids=None):
+        """
+        Deletes all but the newest `POSTS_FEED_SIZE` items from the feeds of
+        `user_ids` (or of every user), in one statement.
+        """
+        items = self.all()
+        if user_ids is not None:
+            items = items.filter(user_id__in=user_ids)
+        # Number each user's items from the newest, in one pass over the
+        # `(user, created_at, id)` index, rather than looking up a cutoff
+        # at an offset of `POSTS_FEED_SIZE` for every row.
+        overflow = items.annotate(position=models.Window(
+            RowNumber(),
+            partition_by=models.F('user_id'),
+            order_by=[models.F('created_at').desc(), models.F('id').desc()],
+        )).filter(position__gt=get_feed_size()).values('pk')
+        return self.model.objects.filter(pk__in=overflow).delete()
+
+
+class FeedItem(models.Model):
+    """
+    An entry in a user's home feed, written when a post is made in one of
+    their communities.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="feed_items",
+        on_delete=models.CASCADE,
+    )
+    post = models.ForeignKey(
+        Post,
+        related_name="feed_items",
+        on_delete=models.CASCADE,
+    )
+    # A copy of `post.created_at`, so that the feed can be ordered without
+    # joining the `Post` table.
+    created_at = models.DateTimeField()
+
+    objects = FeedItemQuerySet.as_manager()
+
+    def __str__(self):
+        return "{} in feed of {}".format(self.post, self.user)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        unique_together = ["user", "post"]
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="posts_feeditem_user_idx",
+            ),
+        ]
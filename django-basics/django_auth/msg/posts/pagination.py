@@ -0,0 +1,77 @@
+"""
+Keyset ("cursor") pagination for lists of posts.
+
+Page-number pagination skips rows with `OFFSET`, which the database still
+has to read, and counts every row for the page links, so later pages get
+slower as the list grows. Here each page instead starts right after the
+last `(created_at, id)` pair of the previous page, which the database can
+seek to on an index ending in `(created_at, id)`. Loading older posts costs
+the same at any depth.
+"""
+import datetime
+
+from django.db.models import Q
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def encode_cursor(created_at, pk):
+    # Microseconds since the epoch are computed exactly, without the
+    # rounding of `datetime.timestamp()`.
+    delta = created_at - EPOCH
+    microseconds = ((delta.days * 86400 + delta.seconds) * 10 ** 6
+                    + delta.microseconds)
+    return "{}_{}".format(microseconds, pk)
+
+
+def decode_cursor(cursor):
+    """Returns `(created_at, pk)`, or `None` for a missing or bad cursor."""
+    try:
+        microseconds, pk = (int(part) for part in cursor.split("_"))
+        created_at = EPOCH + datetime.timedelta(microseconds=microseconds)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+    return created_at, pk
+
+
+def keyset_page(queryset, cursor, page_size):
+    """
+    Returns the `page_size` newest rows of `queryset` that come after
+    `cursor`, and the cursor for the following page (`None` on the last
+    page).
+    """
+    queryset = queryset.order_by("-created_at", "-id")
+    position = decode_cursor(cursor)
+    if position is not None:
+        created_at, pk = position
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+        )
+    # Fetch one extra row to learn whether there is another page.
+    rows = list(queryset[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].pk)
+
+
+class KeysetPaginationMixin:
+    """
+    Pages a `ListView` with `keyset_page()`. The cursor is read from
+    `?before=`, and `next_cursor` is added to the context for the "Older
+    posts" link (see `posts/_pager.html`).
+    """
+    paginate_by = 20
+    cursor_kwarg = "before"
+
+    # `ListView.get_context_data()` calls this when `paginate_by` is set.
+    def paginate_queryset(self, queryset, page_size):
+        rows, self.next_cursor = keyset_page(
+            queryset, self.request.GET.get(self.cursor_kwarg), page_size
+        )
+        return (None, None, rows, self.next_cursor is not None)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["next_cursor"] = self.next_cursor
+        return context
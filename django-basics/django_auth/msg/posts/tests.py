@@ -1,8 +1,14 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.urls import reverse
-from django.test import TestCase
+from django.test import TestCase, override_settings
+
+from communities.models import Community, CommunityMember
 
 from . import models
+from . import pagination
 
 
 class PostTestCaseBase(TestCase):
@@ -55,6 +61,41 @@ class PostPublicViews(PostTestCaseBase):
         )
         self.assertNotIn(msg, resp.context_data["object_list"])
 
+    def test_keyset_pages(self):
+        # Posts created in the same instant are told apart by their IDs.
+        models.Post.objects.update(created_at=self.messages[0].created_at)
+        seen = []
+        rows, cursor = pagination.keyset_page(models.Post.objects.all(),
+                                              None, 2)
+        while True:
+            seen.extend(rows)
+            if cursor is None:
+                break
+            rows, cursor = pagination.keyset_page(
+                models.Post.objects.all(), cursor, 2)
+        self.assertEqual(seen, list(models.Post.objects.order_by("-id")))
+
+    def test_all_list_older_posts(self):
+        oldest = self.messages[4]
+        resp = self.client.get(reverse("posts:all"), {
+            "before": pagination.encode_cursor(self.messages[3].created_at,
+                                               self.messages[3].pk)
+        })
+        self.assertEqual(list(resp.context_data["object_list"]), [oldest])
+        self.assertIsNone(resp.context_data["next_cursor"])
+
+    def test_user_list_queries(self):
+        community = Community.objects.create(name="Django")
+        models.Post.objects.create(user=self.user, community=community,
+                                   message="In a community")
+        url = reverse("posts:for_user",
+                      kwargs={"username": self.user.username.upper()})
+        # The user and one page of posts, however many posts are shown.
+        with self.assertNumQueries(2):
+            resp = self.client.get(url)
+        self.assertEqual(len(resp.context_data["object_list"]), 6)
+        self.assertContains(resp, "Django")
+
     def test_single(self):
         resp = self.client.get(
             reverse("posts:single", kwargs={
@@ -122,3 +163,107 @@ class PostPrivateViews(PostTestCaseBase):
 
         resp2 = self.client.post(url, follow=True)
         self.assertEqual(models.Post.objects.count(), 1)
+
+
+class FeedTests(PostTestCaseBase):
+    def setUp(self):
+        super().setUp()
+        self.member = get_user_model().objects.create(
+            username="member", email="member@example.com")
+        self.banned = get_user_model().objects.create(
+            username="banned", email="banned@example.com")
+        self.community = Community.objects.create(name="Django")
+        CommunityMember.objects.create(
+            community=self.community, user=self.member, role=1)
+        CommunityMember.objects.create(
+            community=self.community, user=self.banned, role=0)
+
+    def test_post_fans_out_to_members(self):
+        post = models.Post.objects.create(
+            user=self.user, community=self.community, message="Hello")
+        self.assertEqual(
+            list(models.FeedItem.objects.values_list("user", "post")),
+            [(self.member.pk, post.pk)]
+        )
+        # Saving the post again doesn't add it to feeds again.
+        post.save()
+        self.assertEqual(models.FeedItem.objects.count(), 1)
+
+    @override_settings(POSTS_FEED_SIZE=3)
+    def test_feed_is_pruned(self):
+        for msg in ["one", "two", "three", "four", "five"]:
+            models.Post.objects.create(
+                user=self.user, community=self.community, message=msg)
+        self.assertEqual(
+            [item.post.message for item in models.FeedItem.objects.all()],
+            ["five", "four", "three"]
+        )
+
+    @override_settings(POSTS_FEED_SIZE=2)
+    def test_prune_keeps_ties_in_feed_order(self):
+        posts = [
+            models.Post.objects.create(user=self.user, message=msg)
+            for msg in ["one", "two", "three"]
+        ]
+        # Items written at the same moment are kept newest `id` first, as
+        # the feed orders them.
+        models.FeedItem.objects.bulk_create([
+            models.FeedItem(user=self.member, post=post,
+                            created_at=posts[0].created_at)
+            for post in posts
+        ])
+        models.FeedItem.objects.prune()
+        self.assertEqual(
+            [item.post.message for item in self.member.feed_items.all()],
+            ["three", "two"]
+        )
+
+    def test_leaving_or_ban_removes_feed_items(self):
+        models.Post.objects.create(
+            user=self.user, community=self.community, message="Hello")
+        other = Community.objects.create(name="Flask")
+        membership = CommunityMember.objects.create(
+            community=other, user=self.member, role=1)
+        models.Post.objects.create(
+            user=self.user, community=other, message="Elsewhere")
+        self.assertEqual(self.member.feed_items.count(), 2)
+
+        membership.delete()
+        self.assertEqual(
+            [item.post.message for item in self.member.feed_items.all()],
+            ["Hello"]
+        )
+
+        membership = self.member.communities.get()
+        membership.role = 0
+        membership.save()
+        self.assertEqual(self.member.feed_items.count(), 0)
+
+    def test_backfill(self):
+        for msg in ["one", "two"]:
+            models.Post.objects.create(
+                user=self.user, community=self.community, message=msg)
+        CommunityMember.objects.create(
+            community=self.community, user=self.user, role=3)
+        call_command("backfill_feeds", stdout=StringIO())
+        self.assertEqual(self.user.feed_items.count(), 2)
+        self.assertEqual(self.member.feed_items.count(), 2)
+        self.assertEqual(self.banned.feed_items.count(), 0)
+
+    def test_feed_view(self):
+        for msg in ["one", "two", "three"]:
+            models.Post.objects.create(
+                user=self.user, community=self.community, message=msg)
+        self.client.force_login(self.member)
+        with self.assertNumQueries(4):
+            # Session, user, one page of feed items and the communities
+            # offered by the post form in the layout.
+            resp = self.client.get(reverse("posts:feed"))
+        self.assertEqual(
+            [item.post.message for item in resp.context_data["object_list"]],
+            ["three", "two", "one"]
+        )
+
+    def test_feed_requires_login(self):
+        resp = self.client.get(reverse("posts:feed"))
+        self.assertEqual(resp.status_code, 302)
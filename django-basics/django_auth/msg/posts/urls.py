@@ -6,6 +6,7 @@ app_name = 'posts'
 
 urlpatterns = [
     re_path(r"^$", views.AllPosts.as_view(), name="all"),
+    re_path(r"feed/$", views.Feed.as_view(), name="feed"),
     re_path(r"new/$", views.CreatePost.as_view(), name="create"),
     re_path(
         # NOTE: If this type of logic is used in production, ensure that user
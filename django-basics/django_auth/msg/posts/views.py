@@ -9,26 +9,58 @@ from braces.views import SelectRelatedMixin
 
 from . import forms
 from . import models
+from . import pagination
 
 
-class AllPosts(SelectRelatedMixin, generic.ListView):
+# Lists of posts are paged with `?before=<cursor>` (see `pagination.py`).
+class AllPosts(pagination.KeysetPaginationMixin, SelectRelatedMixin,
+               generic.ListView):
     model = models.Post
     select_related = ("user", "community")
 
 
-class UserPosts(generic.ListView):
+class Feed(LoginRequiredMixin, pagination.KeysetPaginationMixin,
+           generic.ListView):
+    """
+    The signed-in user's home feed: the newest posts from their
+    communities, read from the `FeedItem` rows written when each post was
+    made.
+    """
+    template_name = "posts/feed.html"
+
+    def get_queryset(self):
+        # One range read on the `(user, created_at)` index of `FeedItem`,
+        # with each post's author and community joined in.
+        return models.FeedItem.objects.filter(
+            user=self.request.user
+        ).select_related("post__user", "post__community")
+
+
+class UserPosts(pagination.KeysetPaginationMixin, generic.ListView):
     model = models.Post
     template_name = "posts/user_timeline.html"
 
     def get_queryset(self):
         try:
-            self.post_user = get_user_model().objects.prefetch_related("posts").get(
+            # Found through the `UPPER(username)` index on the user model.
+            self.post_user = get_user_model().objects.get(
                 username__iexact=self.kwargs.get("username")
             )
         except get_user_model().DoesNotExist:
             raise Http404
         else:
-            return self.post_user.posts.all()
+            # Only one page of posts is fetched, on the `(user, created_at)`
+            # index. Every post is by `post_user`, so there's no need to
+            # join the user table as well.
+            return self.post_user.posts.select_related("community")
+
+    def paginate_queryset(self, queryset, page_size):
+        paginated = super().paginate_queryset(queryset, page_size)
+        # Give each post the user that was already fetched, so that reading
+        # `post.user` in `_post.html` doesn't query for it again.
+        for post in paginated[2]:
+            post.user = self.post_user
+        return paginated
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -0,0 +1,84 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from rest_framework import authentication
+
+
+class TokenCache:
+    """
+    A bounded, thread-safe LRU cache of token keys to `(user, token)`
+    pairs. Entries expire `ttl` seconds after they are stored.
+
+    The cache lives in each worker process, so the signal handlers in
+    `courses.signals` only clear entries in the process that made the
+    change; the TTL bounds how long other processes can keep using a
+    deleted token or a deactivated user.
+    """
+    def __init__(self, max_size, ttl, timer=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.timer = timer
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, user, token = entry
+            if expires <= self.timer():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return user, token
+
+    def set(self, key, user, token):
+        with self.lock:
+            self.entries[key] = (self.timer() + self.ttl, user, token)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def discard_user(self, user_id):
+        with self.lock:
+            for key, (expires, user, token) in list(self.entries.items()):
+                if user.pk == user_id:
+                    del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = TokenCache(
+    max_size=getattr(settings, 'TOKEN_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'TOKEN_CACHE_TTL', 60),
+)
+
+
+class CachedTokenAuthentication(authentication.TokenAuthentication):
+    """
+    `TokenAuthentication` that skips the token and user query for tokens
+    seen recently by this process.
+    """
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            # Raises `AuthenticationFailed` for unknown tokens and inactive
+            # users, which are never cached.
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user, token)
+        else:
+            user, token = cached
+        # Give each request its own copies, so that changes a view makes to
+        # `request.user` don't leak into other requests.
+        return copy.copy(user), copy.copy(token)
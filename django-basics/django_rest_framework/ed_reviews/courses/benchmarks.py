@@ -0,0 +1,163 @@
+"""
+Helpers for the `benchmark_api` and `benchmark_list_serialization`
+management commands.
+"""
+import math
+import statistics
+import threading
+import time
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from . import models
+
+# Number of reviews created per `bulk_create()` query when seeding.
+SEED_BATCH_SIZE = 10000
+
+
+def seed(courses, reviews_per_course):
+    """Creates `courses` courses with `reviews_per_course` reviews each."""
+    created = models.Course.objects.bulk_create([
+        models.Course(title='Benchmark course {}'.format(number),
+                      url='https://example.com/benchmark/{}'.format(number))
+        for number in range(courses)
+    ])
+    batch = []
+    for course in created:
+        for number in range(reviews_per_course):
+            batch.append(models.Review(
+                course=course, name='Learner',
+                email='learner{}@example.com'.format(number),
+                comment='Benchmark review.', rating=number % 5 + 1,
+            ))
+            if len(batch) == SEED_BATCH_SIZE:
+                models.Review.objects.bulk_create(batch)
+                batch = []
+    models.Review.objects.bulk_create(batch)
+    models.Course.objects.rebuild_ratings()
+    return created
+
+
+def get_endpoints(course_pk, review_pk):
+    """Returns `(name, url)` pairs for the read endpoints of both APIs."""
+    course = {'pk': course_pk}
+    return [
+        ('v1 course list', reverse('courses:course_list')),
+        ('v1 course detail', reverse('courses:course_detail', kwargs=course)),
+        ('v1 review list', reverse('courses:review_list',
+                                   kwargs={'course_pk': course_pk})),
+        ('v2 course list', reverse('apiv2:course-list')),
+        ('v2 course batch', reverse('apiv2:course-list') + '?ids={}'.format(
+            ','.join(str(course_pk + offset) for offset in range(20)))),
+        ('v2 course detail', reverse('apiv2:course-detail', kwargs=course)),
+        ('v2 course reviews', reverse('apiv2:course-reviews', kwargs=course)),
+        ('v2 course histogram', reverse('apiv2:course-histogram',
+                                        kwargs=course)),
+        ('v2 top rated', reverse('apiv2:course-top-rated')),
+        ('v2 review detail', reverse('apiv2:review-detail',
+                                     kwargs={'pk': review_pk})),
+    ]
+
+
+def percentile(ordered, percent):
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def run_endpoint(url, requests, concurrency, headers):
+    """
+    Sends `requests` GET requests to `url`, split between `concurrency`
+    threads with their own test clients, and returns the latency
+    percentiles, queries per request, and throughput.
+    """
+    latencies = []
+    queries = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(count):
+        client = Client(HTTP_HOST='localhost', **headers)
+        try:
+            for _ in range(count):
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    response = client.get(url)
+                    elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed * 1000)
+                    queries.append(len(captured))
+                    if response.status_code >= 400:
+                        errors.append(response.status_code)
+        finally:
+            if threading.current_thread() is not threading.main_thread():
+                connection.close()
+
+    shares = [requests // concurrency + (index < requests % concurrency)
+              for index in range(concurrency)]
+    start = time.perf_counter()
+    if concurrency == 1:
+        worker(requests)
+    else:
+        threads = [threading.Thread(target=worker, args=(share,))
+                   for share in shares]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    duration = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'queries_per_request': round(statistics.mean(queries), 2),
+        'throughput_rps': round(len(latencies) / duration, 1),
+    }
+
+
+def run_scale(reviews, reviews_per_course, requests, concurrency,
+              log=lambda message: None):
+    """Reseeds the database with `reviews` reviews and benchmarks every
+    endpoint against it."""
+    # Deleting the courses deletes their reviews too, without adjusting
+    # the totals of courses that are going away.
+    models.Course.objects.all().delete()
+    cache.clear()
+    courses = max(reviews // reviews_per_course, 1)
+    log('Seeding {} course(s) with {} review(s)...'.format(courses, reviews))
+    created = seed(courses, min(reviews_per_course, reviews))
+
+    # A regular user with the course and review model permissions, rather
+    # than a superuser, so that the permission checks are measured as real
+    # clients run them (`has_perm()` returns early for superusers).
+    user, _ = User.objects.update_or_create(
+        username='benchmark', defaults={'is_superuser': False})
+    user.user_permissions.set(Permission.objects.filter(
+        content_type__app_label='courses',
+        content_type__model__in=('course', 'review'),
+    ))
+    token, _ = Token.objects.get_or_create(user=user)
+    headers = {'HTTP_AUTHORIZATION': 'Token {}'.format(token.key)}
+
+    endpoints = {}
+    review_pk = models.Review.objects.values_list('pk', flat=True).first()
+    for name, url in get_endpoints(created[0].pk, review_pk):
+        log('Benchmarking {}...'.format(name))
+        endpoints[name] = dict(url=url, **run_endpoint(
+            url, requests, concurrency, headers))
+    return {
+        'reviews': models.Review.objects.count(),
+        'courses': courses,
+        'endpoints': endpoints,
+    }
@@ -0,0 +1,112 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from rest_framework.response import Response
+
+from . import serializers
+
+# How long a serialized course is cached for, in seconds. Entries for old
+# versions are never read again, so this only bounds how long they linger.
+COURSE_CACHE_TIMEOUT = getattr(settings, 'COURSE_CACHE_TIMEOUT', 300)
+
+
+def conditional_headers(request, etag, updated_at):
+    """
+    Returns `(not_modified, headers)`, where `not_modified` is a 304
+    response if the client's `If-None-Match` or `If-Modified-Since` shows
+    it already has this representation, and `None` otherwise.
+    """
+    last_modified = int(updated_at.timestamp()) if updated_at else None
+    headers = {'ETag': etag}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        for name, value in headers.items():
+            not_modified[name] = value
+    return not_modified, headers
+
+
+def representation_key(request, *parts):
+    # The representation includes absolute URLs (`reviews_url`) and depends
+    # on the requested fields.
+    requested = serializers.get_requested_fields(request)
+    return ':'.join(map(str, (
+        'courses', request.build_absolute_uri('/'),
+        ','.join(sorted(requested)) if requested is not None else '*',
+    ) + parts))
+
+
+class CachedCourseMixin:
+    """
+    Adds `ETag` headers (and `Last-Modified`, for single courses) to course
+    reads, answers conditional GETs with 304 responses, and caches
+    serialized courses in the default cache, keyed by each course's
+    version.
+    """
+    def retrieve(self, request, *args, **kwargs):
+        pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            state = self.get_queryset().prefetch_related(None).filter(
+                pk=pk
+            ).values('version', 'updated_at').first()
+        except (TypeError, ValueError, ValidationError):
+            # A `pk` that isn't an ID (e.g., `abc`), caught as in DRF's
+            # `get_object_or_404()`.
+            state = None
+        if state is None:
+            # Let the view raise its usual 404.
+            return super().retrieve(request, *args, **kwargs)
+
+        etag = '"course-{}-{}"'.format(pk, state['version'])
+        not_modified, headers = conditional_headers(
+            request, etag, state['updated_at'])
+        if not_modified is not None:
+            return not_modified
+
+        key = representation_key(request, pk, state['version'])
+        data = cache.get(key)
+        if data is None:
+            response = super().retrieve(request, *args, **kwargs)
+            cache.set(key, response.data, COURSE_CACHE_TIMEOUT)
+        else:
+            response = Response(data)
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    def list(self, request, *args, **kwargs):
+        # The ETag is a hash of the page that was served, so it changes
+        # whenever any course on the page (or the page's links or count)
+        # changes. Unlike a version for the whole list, it costs no extra
+        # query over all of the courses, which would defeat the bounded
+        # pages of the cursor paginated `top_rated` action. The page is
+        # still built, but an unchanged one isn't sent again. It is added
+        # in `finalize_response()`, once the renderer has been chosen.
+        self.etag_from_content = True
+        return super().list(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs)
+        if not getattr(self, 'etag_from_content', False) or (
+                response.status_code != 200):
+            return response
+        # Render the page now, rather than when Django reads the content,
+        # so the ETag is a hash of the bytes that are sent and the data
+        # is only encoded once.
+        response.render()
+        etag = '"courses-{}"'.format(
+            hashlib.md5(response.content).hexdigest())
+        not_modified, headers = conditional_headers(request, etag, None)
+        if not_modified is not None:
+            return not_modified
+        for name, value in headers.items():
+            response[name] = value
+        return response
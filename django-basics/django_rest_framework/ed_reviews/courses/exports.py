@@ -0,0 +1,94 @@
+import csv
+from itertools import islice
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Number of serialized reviews joined into each chunk of the response.
+ROWS_PER_CHUNK = 500
+
+
+def created_at_filter(name, value, datetime_lookup, date_lookup):
+    """Filters on `created_at` by an ISO 8601 datetime or date."""
+    try:
+        moment = parse_datetime(value)
+        if moment is not None:
+            if timezone.is_naive(moment):
+                moment = timezone.make_aware(moment)
+            return {'created_at__' + datetime_lookup: moment}
+        day = parse_date(value)
+        if day is not None:
+            return {'created_at__date__' + date_lookup: day}
+    except ValueError:
+        pass
+    raise ValidationError({name: 'Enter an ISO 8601 date or datetime.'})
+
+
+def filter_reviews(reviews, params):
+    """Applies the `course`, `since` and `until` export filters."""
+    if params.get('course'):
+        try:
+            course_id = int(params['course'])
+        except ValueError:
+            raise ValidationError({'course': 'Enter a course ID.'})
+        reviews = reviews.filter(course_id=course_id)
+    if params.get('since'):
+        reviews = reviews.filter(
+            **created_at_filter('since', params['since'], 'gte', 'gte'))
+    if params.get('until'):
+        # A date includes the whole day; a datetime is exclusive.
+        reviews = reviews.filter(
+            **created_at_filter('until', params['until'], 'lt', 'lte'))
+    return reviews
+
+
+# Spreadsheet applications treat cells starting with these characters as
+# formulas.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def csv_cell(value):
+    """Stops text written by reviewers (e.g., a comment of `=HYPERLINK(...)`)
+    from being run as a formula when the CSV is opened in a spreadsheet."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class Echo:
+    """A file-like object that returns what is written to it, so that
+    `csv.writer` can format rows for a streaming response."""
+    def write(self, value):
+        return value
+
+
+def stream(rows, plan, request, output):
+    """
+    Yields `rows` (an iterator of `values()` dictionaries) serialized with
+    `plan` as NDJSON or CSV, a chunk of rows at a time.
+    """
+    names = [step.name for step in plan.steps]
+    if output == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(names)
+    encoder = JSONEncoder(ensure_ascii=False)
+    while True:
+        chunk = list(islice(rows, ROWS_PER_CHUNK))
+        if not chunk:
+            return
+        items = plan.serialize(chunk, request)
+        if output == 'csv':
+            yield ''.join(
+                writer.writerow([csv_cell(item[name]) for name in names])
+                for item in items
+            )
+        else:
+            yield ''.join(encoder.encode(item) + '\n' for item in items)
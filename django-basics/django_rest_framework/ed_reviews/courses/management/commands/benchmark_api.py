@@ -0,0 +1,68 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from courses import benchmarks
+from courses.throttling import SlidingWindowThrottle
+
+
+class Command(BaseCommand):
+    help = ('Seeds a throwaway test database with courses and reviews at '
+            'each scale, sends concurrent GET requests to each v1 and v2 '
+            'endpoint, and reports latency percentiles, queries per '
+            'request, and throughput as JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales', default='1000,100000,1000000',
+            help='Comma-separated numbers of reviews to seed.',
+        )
+        parser.add_argument(
+            '--reviews-per-course', type=int, default=100,
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Number of requests sent to each endpoint at each scale.',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=4,
+            help='Number of threads sending requests at the same time.',
+        )
+        parser.add_argument(
+            '--output', help='File to write the report to, if not stdout.',
+        )
+
+    def handle(self, *args, **options):
+        scales = [int(scale) for scale in options['scales'].split(',')]
+        # Use a test database, so that the seeded data never touches the
+        # real one.
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        # Keep the throttles' queries in the measurements, but never
+        # actually throttle the benchmark's requests.
+        throttle_rates = SlidingWindowThrottle.THROTTLE_RATES
+        SlidingWindowThrottle.THROTTLE_RATES = {
+            scope: '1000000000/s' for scope in throttle_rates
+        }
+        try:
+            report = {'scales': [
+                self.run_scale(scale, options) for scale in scales
+            ]}
+        finally:
+            SlidingWindowThrottle.THROTTLE_RATES = throttle_rates
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                report_file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def run_scale(self, reviews, options):
+        return benchmarks.run_scale(reviews, options['reviews_per_course'],
+                                    options['requests'],
+                                    options['concurrency'],
+                                    log=self.stderr.write)
+
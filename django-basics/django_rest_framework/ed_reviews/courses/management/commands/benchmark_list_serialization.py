@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from courses import fastpath, models, serializers
+from courses.benchmarks import seed
+
+
+class Command(BaseCommand):
+    help = ('Compares the time taken to serialize the course and review '
+            'lists with the serializers and with the fast path. Seeds its '
+            'own data, which is rolled back afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=100)
+        parser.add_argument('--reviews-per-course', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            seed(options['courses'], options['reviews_per_course'])
+            request = Request(RequestFactory().get('/', HTTP_HOST='localhost'))
+            cases = (
+                ('courses', serializers.CourseSerializer,
+                 models.Course.objects.order_by('pk'),
+                 lambda queryset: queryset.with_recent_reviews()),
+                ('reviews', serializers.ReviewSerializer,
+                 models.Review.objects.order_by('pk'),
+                 lambda queryset: queryset),
+            )
+            for name, serializer_class, queryset, prepare in cases:
+                self.compare(name, serializer_class, queryset, prepare,
+                             request, options['repeat'])
+            transaction.set_rollback(True)
+
+    def compare(self, name, serializer_class, queryset, prepare, request,
+                repeat):
+        renderer = JSONRenderer()
+        plan = fastpath.get_plan(serializer_class)
+
+        def standard():
+            return renderer.render(serializer_class(
+                prepare(queryset), many=True, context={'request': request}
+            ).data)
+
+        def fast():
+            rows = queryset.values(*plan.columns)
+            return renderer.render(plan.serialize(rows, request))
+
+        if standard() != fast():
+            self.stderr.write('{}: the outputs differ.'.format(name))
+            return
+        timings = {}
+        for label, serialize in (('standard', standard), ('fast', fast)):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                serialize()
+            timings[label] = (time.perf_counter() - start) / repeat * 1000
+        self.stdout.write(
+            '{}: {:.1f} ms with the serializer, {:.1f} ms with the fast path '
+            '({:.1f}x).'.format(name, timings['standard'], timings['fast'],
+                                timings['standard'] / timings['fast'])
+        )
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from rest_framework.settings import api_settings
+
+from courses import models
+from courses.throttling import SlidingWindowThrottle
+
+
+class Command(BaseCommand):
+    help = ('Deletes throttle counters for clients that have not made a '
+            'request in their last two windows.')
+
+    def handle(self, *args, **options):
+        # `parse_rate()` doesn't depend on the throttle's scope, so skip
+        # `__init__()`, which looks the scope's rate up.
+        throttle = SlidingWindowThrottle.__new__(SlidingWindowThrottle)
+        deleted = 0
+        for scope, rate in api_settings.DEFAULT_THROTTLE_RATES.items():
+            num_requests, duration = throttle.parse_rate(rate)
+            current = int(time.time() // duration)
+            # Keys are formatted with `SimpleRateThrottle.cache_format`.
+            deleted += models.ThrottleCounter.objects.filter(
+                key__startswith='throttle_{}_'.format(scope),
+                window__lt=current - 1,
+            ).delete()[0]
+        self.stdout.write('Deleted {} throttle counter(s).'.format(deleted))
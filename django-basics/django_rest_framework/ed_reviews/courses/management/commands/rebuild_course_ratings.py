@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from courses import models
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the rating totals stored on each course.'
+
+    def handle(self, *args, **options):
+        count = models.Course.objects.rebuild_ratings()
+        self.stdout.write('Rebuilt ratings for {} course(s).'.format(count))
@@ -0,0 +1,68 @@
+import re
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+re_accepts_brotli = re.compile(r'\bbr\b')
+
+
+def compress_brotli_sequence(sequence):
+    compressor = brotli.Compressor()
+    for item in sequence:
+        chunk = compressor.process(item)
+        if chunk:
+            yield chunk
+    yield compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compresses API responses with Brotli when the `brotli` package is
+    installed and the client accepts it, and with gzip (through
+    `GZipMiddleware`) otherwise.
+
+    Only the content types in `COMPRESSION_CONTENT_TYPES` are compressed,
+    which leaves out HTML pages with CSRF tokens (see the BREACH attack),
+    and only responses of at least `COMPRESSION_MIN_SIZE` bytes, as
+    compressing small responses costs more CPU than it saves in transfer.
+    """
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if content_type not in getattr(
+                settings, 'COMPRESSION_CONTENT_TYPES',
+                ('application/json', 'application/x-ndjson', 'text/csv')):
+            return response
+        if (not response.streaming and len(response.content)
+                < getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)):
+            return response
+
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if (brotli is None or response.is_async
+                or response.has_header('Content-Encoding')
+                or not re_accepts_brotli.search(accept_encoding)):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.streaming:
+            response.streaming_content = compress_brotli_sequence(
+                response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed_content = brotli.compress(response.content)
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers['Content-Length'] = str(len(response.content))
+
+        # As in `GZipMiddleware`, a strong ETag no longer matches the bytes.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:25
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def compute_rating_totals(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Review = apps.get_model('courses', 'Review')
+    reviews = Review.objects.filter(
+        course=models.OuterRef('pk')
+    ).order_by().values('course')
+    Course.objects.update(
+        rating_sum=Coalesce(models.Subquery(
+            reviews.annotate(total=models.Sum('rating')).values('total')
+        ), 0),
+        review_count=Coalesce(models.Subquery(
+            reviews.annotate(total=models.Count('pk')).values('total')
+        ), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_auto_20160511_1718'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='rating_sum',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='review_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(compute_rating_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_course_rating_totals'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['course', 'created_at', 'id'], name='review_course_created_idx'),
+        ),
+    ]
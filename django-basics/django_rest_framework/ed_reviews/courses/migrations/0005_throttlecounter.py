@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_review_course_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThrottleCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255)),
+                ('window', models.BigIntegerField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('key', 'window')},
+            },
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:44
+
+import courses.models
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Cast, Coalesce
+
+
+# The star ratings and Bayesian score formula as they were when this
+# migration was written. They are copied here rather than imported from
+# `courses.models`, so later changes there don't change what it does.
+RATINGS = range(1, 6)
+
+
+def bayesian_score(rating_sum, review_count):
+    mean = getattr(settings, 'COURSE_RATING_PRIOR_MEAN', 3.0)
+    weight = getattr(settings, 'COURSE_RATING_PRIOR_WEIGHT', 5)
+    return models.ExpressionWrapper(
+        Cast(rating_sum + models.Value(mean * weight), models.FloatField())
+        / (review_count + models.Value(weight)),
+        output_field=models.FloatField(),
+    )
+
+
+def compute_histograms(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Review = apps.get_model('courses', 'Review')
+    reviews = Review.objects.filter(
+        course=models.OuterRef('pk')
+    ).order_by().values('course')
+    Course.objects.update(**{
+        'rating_{}_count'.format(rating): Coalesce(models.Subquery(
+            reviews.filter(rating=rating).annotate(
+                total=models.Count('pk')
+            ).values('total')
+        ), 0)
+        for rating in RATINGS
+    })
+    Course.objects.update(bayesian_score=bayesian_score(
+        models.F('rating_sum'), models.F('review_count')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_throttlecounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='bayesian_score',
+            field=models.FloatField(default=courses.models.rating_prior_mean, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_1_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_2_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_3_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_4_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_5_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['-bayesian_score', '-id'], name='course_bayesian_score_idx'),
+        ),
+        migrations.RunPython(compute_histograms, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,295 @@
-from django.db import models
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import (
+    Case, Count, ExpressionWrapper, F, FloatField, OuterRef, Prefetch,
+    Subquery, Sum, Value, When, Window,
+)
+from django.db.models.functions import Cast, Coalesce, Now, RowNumber
+
+
+# Number of review IDs embedded in each serialized course.
+RECENT_REVIEWS = 5
+
+# The star ratings that are counted in each course's histogram.
+RATINGS = range(1, 6)
+
+
+def rating_prior_mean():
+    return getattr(settings, 'COURSE_RATING_PRIOR_MEAN', 3.0)
+
+
+def bayesian_score(rating_sum, review_count):
+    """
+    Returns an expression for a course's Bayesian average rating: the
+    average of its ratings plus `COURSE_RATING_PRIOR_WEIGHT` imaginary
+    ratings of `COURSE_RATING_PRIOR_MEAN`. Courses with only a few reviews
+    are pulled towards the prior mean, so that a single five-star review
+    doesn't top the leaderboard.
+    """
+    mean = rating_prior_mean()
+    weight = getattr(settings, 'COURSE_RATING_PRIOR_WEIGHT', 5)
+    return ExpressionWrapper(
+        Cast(rating_sum + Value(mean * weight), FloatField())
+        / (review_count + Value(weight)),
+        output_field=FloatField(),
+    )
+
+
+class CourseQuerySet(models.QuerySet):
+    def with_recent_reviews(self, limit=RECENT_REVIEWS):
+        """
+        Prefetches the IDs of each course's most recent reviews into
+        `course.recent_reviews`. The sliced prefetch is run as a single
+        windowed query (`ROW_NUMBER() OVER (PARTITION BY course_id ...)`)
+        across all of the courses.
+        """
+        return self.prefetch_related(Prefetch(
+            'reviews',
+            queryset=Review.objects.only('id', 'course').order_by(
+                '-created_at', '-id'
+            )[:limit],
+            to_attr='recent_reviews',
+        ))
+
+    def apply_review_changes(self, changes):
+        """
+        Adjusts the stored rating totals, histogram counts, and score for
+        an iterable of `(course_id, rating, sign)` changes, where `sign` is
+        `1` for a review that was added and `-1` for one that was removed
+        (or `n` and `-n` for `n` such reviews).
+        Uses `F()` expressions so concurrent writes to the same course
+        can't overwrite each other's totals.
+        """
+        # The rating sum, the review count, and then one count per star.
+        totals = defaultdict(lambda: [0] * (2 + len(RATINGS)))
+        for course_id, rating, sign in changes:
+            totals[course_id][0] += rating * sign
+            totals[course_id][1] += sign
+            if rating in RATINGS:
+                totals[course_id][1 + rating] += sign
+        if not totals:
+            return
+
+        # One UPDATE for all of the courses, however many reviews changed.
+        def delta(index):
+            return Case(
+                *[When(pk=course_id, then=Value(deltas[index]))
+                  for course_id, deltas in totals.items()],
+                default=Value(0),
+            )
+
+        rating_sum = F('rating_sum') + delta(0)
+        review_count = F('review_count') + delta(1)
+        histogram = {
+            'rating_{}_count'.format(rating):
+                F('rating_{}_count'.format(rating)) + delta(1 + rating)
+            for rating in RATINGS
+        }
+        # The right-hand sides all read the values from before the UPDATE.
+        # Every course with a changed review gets a new version, even if its
+        # totals are the same, as its recent reviews may have changed.
+        self.filter(pk__in=totals).update(
+            rating_sum=rating_sum,
+            review_count=review_count,
+            bayesian_score=bayesian_score(rating_sum, review_count),
+            version=F('version') + 1,
+            updated_at=Now(),
+            **histogram
+        )
+
+    def rebuild_ratings(self):
+        """
+        Recomputes the stored rating totals, histogram counts, and score
+        from the reviews, e.g., after changing the score's prior.
+        """
+        reviews = Review.objects.filter(
+            course=OuterRef('pk')
+        ).order_by().values('course')
+
+        def total(aggregate, **filters):
+            return Coalesce(Subquery(reviews.filter(**filters).annotate(
+                total=aggregate
+            ).values('total')), 0)
+
+        count = self.update(
+            rating_sum=total(Sum('rating')),
+            review_count=total(Count('pk')),
+            **{'rating_{}_count'.format(rating): total(Count('pk'),
+                                                       rating=rating)
+               for rating in RATINGS}
+        )
+        # A second UPDATE, so that the score reads the rebuilt totals. It
+        # also gives the courses new versions, so that cached
+        # representations and ETags from before the rebuild aren't reused.
+        self.update(
+            bayesian_score=bayesian_score(F('rating_sum'), F('review_count')),
+            version=F('version') + 1,
+            updated_at=Now(),
+        )
+        return count
 
 
 class Course(models.Model):
     title = models.CharField(max_length=255)
     url = models.URLField(unique=True)
+    # Running totals of the course's reviews, maintained by `Review.save()`,
+    # `Review.delete()` and `ReviewQuerySet.delete()`, so that the average
+    # rating can be served without aggregating over every review.
+    rating_sum = models.IntegerField(default=0, editable=False)
+    review_count = models.IntegerField(default=0, editable=False)
+    # The number of reviews with each star rating.
+    rating_1_count = models.IntegerField(default=0, editable=False)
+    rating_2_count = models.IntegerField(default=0, editable=False)
+    rating_3_count = models.IntegerField(default=0, editable=False)
+    rating_4_count = models.IntegerField(default=0, editable=False)
+    rating_5_count = models.IntegerField(default=0, editable=False)
+    # See `bayesian_score()`. Kept up to date along with the totals, and
+    # indexed for the top rated leaderboard.
+    bayesian_score = models.FloatField(default=rating_prior_mean,
+                                       editable=False)
+    # Incremented whenever the course or any of its reviews change, so that
+    # cached representations and ETags for an older version are never used.
+    version = models.PositiveIntegerField(default=1, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CourseQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-bayesian_score', '-id'],
+                         name='course_bayesian_score_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if not adding:
+            # Increment in the database, so that a concurrent review change
+            # can't be lost by saving a stale version number.
+            self.version = F('version') + 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {
+                    *kwargs['update_fields'], 'version', 'updated_at'
+                }
+        super().save(*args, **kwargs)
+        if not adding:
+            self.refresh_from_db(fields=['version'])
+
+    @property
+    def average_rating(self):
+        if not self.review_count:
+            return None
+        return self.rating_sum / self.review_count
+
+    @property
+    def rating_histogram(self):
+        return {
+            str(rating): getattr(self, 'rating_{}_count'.format(rating))
+            for rating in RATINGS
+        }
+
+
+class ReviewQuerySet(models.QuerySet):
+    def delete(self):
+        """
+        Deletes the reviews (e.g., through the admin's "delete selected"
+        action) and takes them out of their courses' totals with a single
+        UPDATE, rather than one per review.
+        """
+        with transaction.atomic():
+            changes = [
+                (row['course_id'], row['rating'], -row['reviews'])
+                for row in self.order_by().values(
+                    'course_id', 'rating'
+                ).annotate(reviews=Count('pk'))
+            ]
+            result = super().delete()
+            Course.objects.apply_review_changes(changes)
+        return result
+
+    def recent_ids(self, course_ids, limit=RECENT_REVIEWS):
+        """
+        Returns a dictionary of each course's most recent review IDs, the
+        same IDs that `CourseQuerySet.with_recent_reviews()` prefetches,
+        with a single windowed query.
+        """
+        rows = self.filter(course_id__in=course_ids).annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=F('course'),
+                order_by=[F('created_at').desc(), F('id').desc()],
+            )
+        ).filter(position__lte=limit).order_by(
+            'course', 'position'
+        ).values_list('course_id', 'id')
+        recent = defaultdict(list)
+        for course_id, review_id in rows:
+            recent[course_id].append(review_id)
+        return recent
+
+    def upsert(self, reviews):
+        """
+        Saves unsaved `reviews` with a single `INSERT ... ON CONFLICT DO
+        UPDATE` statement: a review for an (email, course) pair that has
+        already been reviewed replaces the stored name, comment, and rating.
+        Adjusts the courses' rating totals and returns the reviews with
+        their primary keys and creation times set.
+        """
+        keys = {(review.email, review.course_id) for review in reviews}
+        matching = self.filter(
+            email__in={email for email, course_id in keys},
+            course__in={course_id for email, course_id in keys},
+        )
+        with transaction.atomic():
+            # Lock the courses first, so that concurrent upserts to the same
+            # course can't both count the same new review. Locking them in
+            # primary key order keeps two batches with overlapping courses
+            # from deadlocking.
+            list(Course.objects.select_for_update().filter(
+                pk__in={course_id for email, course_id in keys}
+            ).order_by('pk').values_list('pk'))
+            stored = {
+                (email, course_id): rating
+                for email, course_id, rating in matching.values_list(
+                    'email', 'course_id', 'rating'
+                ) if (email, course_id) in keys
+            }
+            self.bulk_create(
+                reviews,
+                update_conflicts=True,
+                unique_fields=['email', 'course'],
+                update_fields=['name', 'comment', 'rating'],
+            )
+            changes = [(review.course_id, review.rating, 1)
+                       for review in reviews]
+            changes += [(course_id, rating, -1)
+                        for (email, course_id), rating in stored.items()]
+            Course.objects.apply_review_changes(changes)
+
+            # Rows that were updated rather than inserted don't have their
+            # primary keys set by `bulk_create()`, and keep their original
+            # `created_at`. Read them back before committing, while this
+            # transaction still holds the locks on the rows it wrote, so
+            # that none of them can have been deleted in the meantime.
+            saved = {
+                (email, course_id): (pk, created_at)
+                for email, course_id, pk, created_at in matching.values_list(
+                    'email', 'course_id', 'pk', 'created_at'
+                )
+            }
+
+        for review in reviews:
+            review.pk, review.created_at = saved[
+                (review.email, review.course_id)
+            ]
+            review._state.adding = False
+            review._stored_rating = (review.course_id, review.rating)
+        return reviews
+
 
 class Review(models.Model):
     course = models.ForeignKey(
@@ -21,8 +303,66 @@ class Review(models.Model):
     rating = models.IntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ReviewQuerySet.as_manager()
+
     class Meta:
         unique_together = ['email', 'course']
+        indexes = [
+            # Supports the newest-first cursor pagination of a course's
+            # reviews.
+            models.Index(fields=['course', 'created_at', 'id'],
+                         name='review_course_created_idx'),
+        ]
+
+    def __str__(self):
+        return '{0.rating} by {0.email} for {0.course}'.format(self)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        review = super().from_db(db, field_names, values)
+        # Remember what the stored rating counts towards, so that `save()`
+        # can take it back out of the course's totals.
+        if not review.get_deferred_fields() & {'course_id', 'rating'}:
+            review._stored_rating = (review.course_id, review.rating)
+        return review
+
+    def save(self, *args, **kwargs):
+        stored_rating = getattr(self, '_stored_rating', None)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            changes = [(self.course_id, self.rating, 1)]
+            if stored_rating is not None:
+                changes.append(stored_rating + (-1,))
+            Course.objects.apply_review_changes(changes)
+        self._stored_rating = (self.course_id, self.rating)
+
+    def delete(self, *args, **kwargs):
+        # Reviews deleted along with their course (e.g., `course.delete()`)
+        # don't pass through here, which leaves Django free to delete them
+        # with a single query rather than loading each one.
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            Course.objects.apply_review_changes(
+                [(self.course_id, self.rating, -1)]
+            )
+        self._stored_rating = None
+        return result
+
+
+class ThrottleCounter(models.Model):
+    """
+    Number of requests made under a throttle key (e.g.,
+    `throttle_anon_127.0.0.1`) during one fixed window of the throttle's
+    duration. Stored in the database so that every worker process shares
+    the same counts; see `courses.throttling`.
+    """
+    key = models.CharField(max_length=255)
+    # Start of the window, in whole durations since the epoch.
+    window = models.BigIntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['key', 'window']
 
     def __str__(self):
-        return '{0.rating} by {0.email} for {0.course}'.format(self)
\ No newline at end of file
+        return '{0.count} for {0.key} in window {0.window}'.format(self)
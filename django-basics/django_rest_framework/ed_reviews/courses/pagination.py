@@ -0,0 +1,175 @@
+import base64
+import binascii
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CoursePagination(pagination.PageNumberPagination):
+    """
+    Default pagination for the API. Clients may ask for a different page
+    size with `?page_size=`, up to `max_page_size`. The default comes from
+    `PAGE_SIZE` in `settings.py`.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+
+
+class KeysetCursorPagination(pagination.BasePagination):
+    """
+    Pages through rows in descending `(key_field, id)` order. Each cursor
+    holds the `(key, id)` pair of the row the page starts after, and the
+    page is fetched with `WHERE (key, id) < (<key>, <id>)`, which the
+    database can seek to on an index ending in `(key_field, id)`, so each
+    page costs the same however deep it is.
+
+    DRF's `CursorPagination` isn't used because it seeks on the first
+    ordering field only and steps over ties with an offset, which is capped
+    at `offset_cutoff`, so it can't page past a long run of equal keys.
+    Subclasses set `key_field` and how its values are written in cursors.
+    """
+    key_field = None
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+
+    # Read by `fastpath.FastListMixin`, which fetches these columns.
+    @property
+    def ordering(self):
+        return ('-' + self.key_field, '-id')
+
+    def encode_key(self, key):
+        raise NotImplementedError
+
+    def decode_key(self, value):
+        """Returns the key, or `None` if `value` isn't a valid key."""
+        raise NotImplementedError
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, row, reverse):
+        key, pk = self.get_position(row)
+        value = '{}|{}|{}'.format(self.encode_key(key), pk, int(reverse))
+        cursor = base64.urlsafe_b64encode(value.encode('ascii')).decode()
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, cursor
+        )
+
+    def decode_cursor(self, request):
+        """Returns `(key, pk, reverse)`, or `None` for the first page."""
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            value = base64.urlsafe_b64decode(cursor.encode('ascii')).decode()
+            key, pk, reverse = value.split('|')
+            key = self.decode_key(key)
+            if key is None:
+                raise ValueError(key)
+            return key, int(pk), bool(int(reverse))
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_position(self, row):
+        # Rows are model instances, or `values()` dictionaries on the fast
+        # path.
+        if isinstance(row, dict):
+            return row[self.key_field], row['id']
+        return getattr(row, self.key_field), row.pk
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor[2]
+        field = self.key_field
+        if cursor is None:
+            queryset = queryset.order_by('-' + field, '-id')
+        elif not reverse:
+            key, pk = cursor[:2]
+            queryset = queryset.filter(
+                Q(**{field + '__lt': key}) | Q(**{field: key, 'pk__lt': pk})
+            ).order_by('-' + field, '-id')
+        else:
+            # Fetch the previous page by seeking the other way, then put it
+            # back in descending order.
+            key, pk = cursor[:2]
+            queryset = queryset.filter(
+                Q(**{field + '__gt': key}) | Q(**{field: key, 'pk__gt': pk})
+            ).order_by(field, 'id')
+
+        # Fetch one extra row to learn whether there is another page.
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.page or not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.page or not self.has_previous:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class ReviewCursorPagination(KeysetCursorPagination):
+    """
+    Pages through reviews newest first using an opaque cursor rather than
+    a page number, seeking on the `(course, created_at, id)` index. No
+    `COUNT(*)` query is needed.
+    """
+    key_field = 'created_at'
+    max_page_size = 100
+
+    def encode_key(self, key):
+        return key.isoformat()
+
+    def decode_key(self, value):
+        return parse_datetime(value)
+
+
+class TopRatedCursorPagination(KeysetCursorPagination):
+    """
+    Pages through courses from the highest Bayesian score down, seeking on
+    the `(bayesian_score, id)` index. Every course without reviews ties at
+    the prior mean, so a seek on the score alone couldn't page past them.
+    """
+    key_field = 'bayesian_score'
+
+    def encode_key(self, key):
+        # `repr()` round-trips floats exactly.
+        return repr(key)
+
+    def decode_key(self, value):
+        return float(value)
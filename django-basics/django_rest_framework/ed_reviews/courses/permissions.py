@@ -0,0 +1,107 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from rest_framework import permissions
+
+
+# Cache keys for the permission versions. A user's version changes when
+# their groups or permissions change, and the global version changes when
+# any group's permissions change.
+USER_VERSION_KEY = 'courses:perms_version:{}'
+GLOBAL_VERSION_KEY = 'courses:perms_version'
+
+# Most snapshots kept by each process before they are all dropped.
+MAX_SNAPSHOTS = 1024
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def bump_user_version(*user_ids):
+    cache.set_many({USER_VERSION_KEY.format(user_id): uuid.uuid4().hex
+                    for user_id in user_ids}, None)
+
+
+def bump_global_version():
+    cache.set(GLOBAL_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def get_versions(user_id):
+    keys = [USER_VERSION_KEY.format(user_id), GLOBAL_VERSION_KEY]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Start with a fresh version, rather than `None`, so that a
+            # version evicted from the cache can never match a snapshot
+            # taken before it was bumped.
+            cache.add(key, uuid.uuid4().hex, None)
+            versions[key] = cache.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+def get_snapshot_ttl():
+    # Seconds a snapshot is used before it is loaded again, whatever the
+    # versions say.
+    return getattr(settings, 'PERMISSION_SNAPSHOT_TTL', 30)
+
+
+def get_permission_snapshot(user):
+    """
+    Returns the set of `app_label.codename` permissions held by `user`,
+    through their groups or directly. The set is loaded once per process
+    and kept until the user's permission version or the global version
+    changes (see `courses.signals`), or for at most
+    `PERMISSION_SNAPSHOT_TTL` seconds.
+    """
+    versions = get_versions(user.pk)
+    now = time.monotonic()
+    snapshot = _snapshots.get(user.pk)
+    if (snapshot is not None and snapshot[0] == versions
+            and snapshot[1] > now):
+        return snapshot[2]
+
+    perms = frozenset(user.get_all_permissions())
+    with _snapshots_lock:
+        if len(_snapshots) >= MAX_SNAPSHOTS:
+            _snapshots.clear()
+        _snapshots[user.pk] = (versions, now + get_snapshot_ttl(), perms)
+    return perms
+
+
+class CachedDjangoModelPermissions(permissions.DjangoModelPermissions):
+    """
+    `DjangoModelPermissions` that checks the required permissions against
+    a cached snapshot of the user's permissions, rather than loading them
+    from the user's groups and permissions on every request.
+
+    The versions are kept in the default cache. When that cache is shared
+    by the worker processes (e.g., memcached or Redis), a change made in
+    one process reaches the others on their next request. With a
+    per-process cache, such as the `LocMemCache` configured in
+    `settings.py`, the other processes only see the change once their
+    snapshots expire, after `PERMISSION_SNAPSHOT_TTL` seconds.
+    """
+    def has_permission(self, request, view):
+        user = request.user
+        if not user or (
+           not user.is_authenticated and self.authenticated_users_only):
+            return False
+
+        # Workaround to ensure DjangoModelPermissions are not applied
+        # to the root view when using DefaultRouter.
+        if getattr(view, '_ignore_model_permissions', False):
+            return True
+
+        if not user.is_active:
+            return False
+        if user.is_superuser:
+            return True
+
+        queryset = self._queryset(view)
+        perms = self.get_required_permissions(request.method, queryset.model)
+        # Reads don't require any permissions.
+        return not perms or get_permission_snapshot(user).issuperset(perms)
@@ -0,0 +1,45 @@
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    Renders compact JSON with `orjson` when it is installed, and with
+    `JSONRenderer` (the standard library's `json`, which also has a C
+    accelerated encoder) otherwise, or when pretty printing or escaping
+    non-ASCII characters. Dates and times are passed to DRF's encoder, so
+    they are formatted as `JSONRenderer` formats them. The output is
+    otherwise the same as `JSONRenderer`'s, except that `orjson` writes
+    floats in exponent form without a `+` or leading zero (`1e20` rather
+    than `1e+20`, the same value), and renders `NaN` and infinite floats
+    as `null` rather than raising an error.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii
+                or not self.compact
+                or self.get_indent(accepted_media_type,
+                                   renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=encoders.JSONEncoder().default,
+                option=(orjson.OPT_NON_STR_KEYS
+                        | orjson.OPT_PASSTHROUGH_DATETIME),
+            )
+        except orjson.JSONEncodeError:
+            # E.g., integers too large for 64 bits.
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Like `JSONRenderer`, escape U+2028 and U+2029, so that the output
+        # is a strict subset of JavaScript.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+                b'\xe2\x80\xa9', b'\\u2029')
+        return ret
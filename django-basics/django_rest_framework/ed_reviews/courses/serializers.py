@@ -1,11 +1,46 @@
-from django.db.models import Avg
+from django.db import transaction
 
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.validators import UniqueTogetherValidator
 
 from . import models
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+def get_requested_fields(request):
+    """
+    Returns the set of field names requested with `?fields=` (e.g.,
+    `?fields=id,title,average_rating`), or `None` when every field should be
+    included. Only reads can be sparse, since dropping fields from a write
+    would silently ignore the submitted values.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    fields = request.query_params.get('fields')
+    if not fields:
+        return None
+    return {name.strip() for name in fields.split(',') if name.strip()}
+
+
+def round_rating(average):
+    if average is None:
+        return 0
+    # Ensure you're always dealing 0.5 increments (e.g., 1.0, 2.5, etc.).
+    return round(average * 2) / 2
+
+
+class SparseFieldsMixin:
+    """Drops any fields that weren't requested with `?fields=`."""
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = get_requested_fields(self.context.get('request'))
+        if requested is None:
+            return fields
+        return {name: field for name, field in fields.items()
+                if name in requested}
+
+
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Review
         fields = (
@@ -33,7 +68,111 @@ class ReviewSerializer(serializers.ModelSerializer):
         )
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseIdField(serializers.PrimaryKeyRelatedField):
+    """
+    Accepts a course ID without looking the course up, so that
+    `BulkReviewListSerializer` can look up every course in the batch at
+    once.
+    """
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class BulkReviewListSerializer(serializers.ListSerializer):
+    """
+    Validates and creates a batch of reviews. Errors are reported per item,
+    in the same order as the submitted reviews.
+    """
+    def to_internal_value(self, data):
+        # Runs each review through `BulkReviewSerializer`, including
+        # `validate_rating`.
+        reviews = super().to_internal_value(data)
+
+        # Look up all of the batch's courses with a single query.
+        courses = models.Course.objects.in_bulk(
+            {review['course'] for review in reviews}
+        )
+        does_not_exist = CourseIdField.default_error_messages['does_not_exist']
+        errors = []
+        for review in reviews:
+            course = courses.get(review['course'])
+            if course is None:
+                errors.append({'course': [
+                    does_not_exist.format(pk_value=review['course'])
+                ]})
+            else:
+                review['course'] = course
+                errors.append({})
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        # Check that each (email, course) pair is unique, both within the
+        # batch and against the stored reviews, with a single query rather
+        # than one `UniqueTogetherValidator` query per review. When
+        # upserting, stored reviews are replaced, but a pair still can't
+        # appear twice in one batch.
+        upsert = self.context.get('upsert', False)
+        taken = set() if upsert else set(models.Review.objects.filter(
+            email__in={review['email'] for review in reviews},
+            course__in={review['course'] for review in reviews},
+        ).values_list('email', 'course_id'))
+        message = UniqueTogetherValidator.message.format(
+            field_names='email, course'
+        )
+        errors = []
+        for review in reviews:
+            key = (review['email'], review['course'].pk)
+            errors.append({'non_field_errors': [message]} if key in taken else {})
+            taken.add(key)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return reviews
+
+    def create(self, validated_data):
+        if self.context.get('upsert', False):
+            return models.Review.objects.upsert(
+                [models.Review(**item) for item in validated_data]
+            )
+        with transaction.atomic():
+            reviews = models.Review.objects.bulk_create(
+                [models.Review(**item) for item in validated_data]
+            )
+            # `bulk_create()` doesn't call `Review.save()`, so update the
+            # courses' rating totals here, once for the whole batch.
+            models.Course.objects.apply_review_changes(
+                (review.course_id, review.rating, 1) for review in reviews
+            )
+        return reviews
+
+
+class BulkReviewSerializer(ReviewSerializer):
+    course = CourseIdField(queryset=models.Course.objects.all())
+
+    class Meta(ReviewSerializer.Meta):
+        list_serializer_class = BulkReviewListSerializer
+        # Uniqueness is checked for the whole batch at once by
+        # `BulkReviewListSerializer`.
+        validators = []
+
+
+class UpsertReviewSerializer(ReviewSerializer):
+    class Meta(ReviewSerializer.Meta):
+        # A review for an (email, course) pair that has already been
+        # reviewed replaces the stored review instead of failing validation.
+        validators = []
+
+    def create(self, validated_data):
+        return models.Review.objects.upsert(
+            [models.Review(**validated_data)]
+        )[0]
+
+
+class CourseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Automatically include any reviews related to a course instance.
     NOTE: This will bring in EVERY review related to the course, so
@@ -57,10 +196,24 @@ class CourseSerializer(serializers.ModelSerializer):
     Another option in which you only fetch the primary key(s) of related
     field(s). This is generally the fastest option.
     """
-    reviews = serializers.PrimaryKeyRelatedField(
-        many=True,
+    # reviews = serializers.PrimaryKeyRelatedField(
+    #     many=True,
+    #     read_only=True,
+    # )
+
+    """
+    Only the IDs of the most recent reviews are included, along with the
+    total number of reviews and a link to the paginated list of all of
+    them. This keeps the size of each course bounded however popular it is.
+    """
+    reviews = serializers.SerializerMethodField()
+    reviews_count = serializers.IntegerField(
+        source='review_count',
         read_only=True,
     )
+    reviews_url = serializers.HyperlinkedIdentityField(
+        view_name='apiv2:course-reviews',
+    )
     average_rating = serializers.SerializerMethodField()
 
     class Meta:
@@ -71,22 +224,26 @@ class CourseSerializer(serializers.ModelSerializer):
             'url',
             # Should correspond to the `related_name` in `models.py`:
             'reviews',
+            'reviews_count',
+            'reviews_url',
             'average_rating',
         )
 
+    def get_reviews(self, obj):
+        # Use the IDs prefetched by `Course.objects.with_recent_reviews()`
+        # when available (e.g., not for a course that was just created).
+        recent_reviews = getattr(obj, 'recent_reviews', None)
+        if recent_reviews is None:
+            recent_reviews = obj.reviews.order_by(
+                '-created_at', '-id'
+            )[:models.RECENT_REVIEWS]
+        return [review.pk for review in recent_reviews]
+
     # When working with `SerializerMethodField` to add custom data to the
     # serialized output, the method needs to follow a `get_field` pattern.
     # `obj` is the object that is being serialized.
     def get_average_rating(self, obj):
-        # NOTE: This is probably not the best way to get average ratings,
-        # as it will be taxing on your query time as the database continues
-        # to grow. It would be best to add an `average_rating` field to the
-        # model itself and store a value that is calculated and updated
-        # each time a review is submitted using Django's `signals`.
-        average = obj.reviews.aggregate(Avg('rating')).get('rating__avg')
-
-        if average is None:
-            return 0
-        # Ensure you're always dealing 0.5 increments (e.g., 1.0, 2.5, etc.).
-        return round(average * 2) / 2
-
+        # The average is derived from the rating totals stored on the
+        # course, which are updated each time a review is saved or deleted,
+        # so no aggregate query is needed here.
+        return round_rating(obj.average_rating)
@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from . import permissions
+from .authentication import token_cache
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def forget_token(sender, instance, **kwargs):
+    token_cache.discard(instance.key)
+
+
+# Saving a user may deactivate them or change their password, so forget
+# any of their cached tokens and look the user up again on the next request.
+@receiver(post_save, sender=User)
+def forget_user_tokens(sender, instance, **kwargs):
+    token_cache.discard_user(instance.pk)
+
+
+# Group and permission changes made through the admin or the related
+# managers (e.g., `user.groups.add(group)`) send `m2m_changed` rather than
+# `post_save`.
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def user_permissions_changed(sender, instance, action, reverse, pk_set,
+                             **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        # `instance` is the user.
+        permissions.bump_user_version(instance.pk)
+    elif action == 'post_clear':
+        # The affected users aren't known, e.g., after `group.user_set.clear()`.
+        permissions.bump_global_version()
+    else:
+        permissions.bump_user_version(*pk_set)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def group_permissions_changed(sender, **kwargs):
+    if kwargs.get('action', 'post_').startswith('post_'):
+        permissions.bump_global_version()
+
@@ -1,3 +1,800 @@
-from django.test import TestCase
+import csv
+import datetime
+import hashlib
+import json
+import time
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser, Group, Permission, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from . import benchmarks
+from . import models
+from . import renderers
+from . import serializers
+from . import throttling
+from .authentication import token_cache
+
+
+class CourseAPITestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('kennethlove', password='test')
+        self.course = models.Course.objects.create(
+            title='Python Collections',
+            url='https://teamtreehouse.com/library/python-collections'
+        )
+
+    def create_review(self, course=None, email='learner@example.com',
+                      rating=4):
+        return models.Review.objects.create(
+            course=course or self.course,
+            name='Learner',
+            email=email,
+            rating=rating
+        )
+
+
+class CourseRatingTests(CourseAPITestCase):
+    def assertRatings(self, rating_sum, review_count):
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.rating_sum, rating_sum)
+        self.assertEqual(self.course.review_count, review_count)
+
+    def test_totals_follow_review_writes(self):
+        self.client.force_authenticate(self.user)
+        resp = self.client.post(
+            reverse('courses:review_list',
+                    kwargs={'course_pk': self.course.pk}),
+            {'name': 'Learner', 'email': 'one@example.com', 'rating': 5,
+             'course': self.course.pk}
+        )
+        self.assertEqual(resp.status_code, 201)
+        resp = self.client.post(
+            reverse('apiv2:review-list'),
+            {'name': 'Learner', 'email': 'two@example.com', 'rating': 2,
+             'course': self.course.pk}
+        )
+        self.assertEqual(resp.status_code, 201)
+        self.assertRatings(7, 2)
+
+        resp = self.client.patch(
+            reverse('apiv2:review-detail', kwargs={'pk': resp.data['id']}),
+            {'rating': 3}
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertRatings(8, 2)
+
+        resp = self.client.delete(
+            reverse('apiv2:review-detail', kwargs={'pk': resp.data['id']})
+        )
+        self.assertEqual(resp.status_code, 204)
+        self.assertRatings(5, 1)
+
+    def test_queryset_delete(self):
+        # E.g., the admin's "delete selected" action.
+        self.create_review(rating=4)
+        self.create_review(email='two@example.com', rating=2)
+        self.create_review(email='three@example.com', rating=2)
+        # The grouped totals, a single DELETE, the UPDATE and the savepoint,
+        # without loading the reviews themselves (Django's fast delete).
+        with self.assertNumQueries(5):
+            models.Review.objects.filter(email='two@example.com').delete()
+        self.assertRatings(6, 2)
+        self.assertEqual(self.course.rating_histogram,
+                         {'1': 0, '2': 1, '3': 0, '4': 1, '5': 0})
+
+        models.Review.objects.get(email='three@example.com').delete()
+        self.assertRatings(4, 1)
+
+    def test_rebuild_command(self):
+        self.create_review(rating=4)
+        self.create_review(email='other@example.com', rating=1)
+        models.Course.objects.update(rating_sum=0, review_count=0,
+                                     rating_4_count=0, bayesian_score=0)
+        call_command('rebuild_course_ratings', stdout=StringIO())
+        self.assertRatings(5, 2)
+        self.assertEqual(self.course.rating_histogram,
+                         {'1': 1, '2': 0, '3': 0, '4': 1, '5': 0})
+        self.assertAlmostEqual(self.course.bayesian_score, 20 / 7)
+
+    def test_list_queries_do_not_grow_with_courses(self):
+        for number in range(4):
+            course = models.Course.objects.create(
+                title='Course {}'.format(number),
+                url='https://example.com/{}'.format(number)
+            )
+            self.create_review(course=course)
+        # Start the throttles' windows.
+        self.client.get(reverse('courses:course_list'))
+        # The anonymous and user throttles' counters, the count, the page of
+        # courses, and the recent reviews prefetch.
+        with self.assertNumQueries(5):
+            resp = self.client.get(reverse('courses:course_list'))
+        self.assertEqual(resp.data['results'][1]['average_rating'], 4)
+
+
+class CourseReviewsFieldTests(CourseAPITestCase):
+    def test_reviews_are_capped(self):
+        reviews = [
+            self.create_review(email='{}@example.com'.format(number))
+            for number in range(models.RECENT_REVIEWS + 2)
+        ]
+        # `DjangoModelPermissions` requires an authenticated user.
+        self.client.force_authenticate(self.user)
+        resp = self.client.get(
+            reverse('apiv2:course-detail', kwargs={'pk': self.course.pk})
+        )
+        self.assertEqual(
+            resp.data['reviews'],
+            [review.pk for review in reversed(reviews)][:models.RECENT_REVIEWS]
+        )
+        self.assertEqual(resp.data['reviews_count'], len(reviews))
+        self.assertEqual(
+            resp.data['reviews_url'],
+            'http://testserver' + reverse(
+                'apiv2:course-reviews', kwargs={'pk': self.course.pk})
+        )
+
+
+class ReviewPaginationTests(CourseAPITestCase):
+    def test_cursor_pages_newest_first(self):
+        reviews = [
+            self.create_review(email='{}@example.com'.format(number))
+            for number in range(7)
+        ]
+        resp = self.client.get(
+            reverse('courses:review_list',
+                    kwargs={'course_pk': self.course.pk}),
+            {'page_size': 5}
+        )
+        self.assertNotIn('count', resp.data)
+        ids = [review['id'] for review in resp.data['results']]
+
+        # Only the throttles' counters and the page itself are queried;
+        # there is no `COUNT(*)`.
+        with self.assertNumQueries(3):
+            resp = self.client.get(resp.data['next'])
+        ids += [review['id'] for review in resp.data['results']]
+        self.assertEqual(ids, [review.pk for review in reversed(reviews)])
+        self.assertIsNone(resp.data['next'])
+
+    def test_cursor_pages_through_ties(self):
+        # Reviews that share a `created_at` value are ordered by ID.
+        for number in range(7):
+            self.create_review(email='{}@example.com'.format(number))
+        models.Review.objects.update(created_at=timezone.now())
+        url = reverse('courses:review_list',
+                      kwargs={'course_pk': self.course.pk}) + '?page_size=3'
+        ids = []
+        while url:
+            resp = self.client.get(url)
+            ids += [review['id'] for review in resp.data['results']]
+            url = resp.data['next']
+        self.assertEqual(ids, list(models.Review.objects.order_by(
+            '-id').values_list('pk', flat=True)))
+
+    def test_page_size_is_per_request(self):
+        for number in range(3):
+            self.create_review(email='{}@example.com'.format(number))
+            models.Course.objects.create(
+                title='Course {}'.format(number),
+                url='https://example.com/{}'.format(number)
+            )
+        self.client.force_authenticate(self.user)
+        resp = self.client.get(
+            reverse('apiv2:course-reviews', kwargs={'pk': self.course.pk}),
+            {'page_size': 1}
+        )
+        self.assertEqual(len(resp.data['results']), 1)
+
+        # The page size chosen above must not leak into other requests.
+        resp = self.client.get(reverse('apiv2:course-list'))
+        self.assertEqual(len(resp.data['results']), 4)
+
+        resp = self.client.get(reverse('apiv2:course-list'),
+                               {'page_size': 1000})
+        self.assertEqual(len(resp.data['results']), 4)
+
+
+class BulkReviewTests(CourseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def review_data(self, email, rating=4):
+        return {'name': 'Learner', 'email': email, 'rating': rating,
+                'course': self.course.pk}
+
+    def test_creates_reviews_and_totals(self):
+        resp = self.client.post(
+            reverse('apiv2:review-bulk'),
+            [self.review_data('{}@example.com'.format(number), rating=number)
+             for number in range(1, 6)],
+            format='json'
+        )
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(len(resp.data), 5)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.rating_sum, 15)
+        self.assertEqual(self.course.review_count, 5)
+
+    def test_errors_are_per_review_and_nothing_is_saved(self):
+        self.create_review(email='taken@example.com')
+        resp = self.client.post(
+            reverse('apiv2:review-bulk'),
+            [self.review_data('new@example.com'),
+             self.review_data('taken@example.com'),
+             self.review_data('new@example.com')],
+            format='json'
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data[0], {})
+        self.assertIn('non_field_errors', resp.data[1])
+        self.assertIn('non_field_errors', resp.data[2])
+        self.assertEqual(models.Review.objects.count(), 1)
+
+    def test_queries_do_not_grow_with_reviews(self):
+        other = models.Course.objects.create(
+            title='Python Collections',
+            url='http://teamtreehouse.com/library/python-collections'
+        )
+        # Warm up the throttle counters, which are written once per request.
+        self.client.get(reverse('apiv2:course-list'))
+        data = [dict(self.review_data('{}@example.com'.format(number)),
+                     course=(self.course, other)[number % 2].pk)
+                for number in range(100)]
+        # Throttle, courses, uniqueness check, insert, totals and the
+        # transaction's savepoint and release.
+        with self.assertNumQueries(7):
+            resp = self.client.post(reverse('apiv2:review-bulk'), data,
+                                    format='json')
+        self.assertEqual(resp.status_code, 201)
+
+    def test_missing_course_is_reported_per_review(self):
+        resp = self.client.post(
+            reverse('apiv2:review-bulk'),
+            [self.review_data('one@example.com'),
+             dict(self.review_data('two@example.com'), course=999)],
+            format='json'
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data[0], {})
+        self.assertIn('course', resp.data[1])
+
+
+class ReviewUpsertTests(CourseAPITestCase):
+    def test_repeat_review_replaces_the_stored_one(self):
+        review = self.create_review(rating=2)
+        self.client.force_authenticate(self.user)
+        resp = self.client.post(
+            reverse('apiv2:review-list') + '?upsert=true',
+            {'name': 'Learner', 'email': review.email, 'rating': 5,
+             'comment': 'Better the second time.', 'course': self.course.pk}
+        )
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data['id'], review.pk)
+        review.refresh_from_db()
+        self.assertEqual(review.rating, 5)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.rating_sum, 5)
+        self.assertEqual(self.course.review_count, 1)
+
+    def test_bulk_upsert_mixes_inserts_and_updates(self):
+        self.create_review(email='old@example.com', rating=1)
+        self.client.force_authenticate(self.user)
+        resp = self.client.post(
+            reverse('apiv2:review-bulk') + '?upsert=true',
+            [{'name': 'Learner', 'email': email, 'rating': 4,
+              'course': self.course.pk}
+             for email in ('old@example.com', 'new@example.com')],
+            format='json'
+        )
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(models.Review.objects.count(), 2)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.rating_sum, 8)
+        self.assertEqual(self.course.review_count, 2)
+
+
+class SlidingWindowThrottleTests(TestCase):
+    def allow(self, now):
+        throttle = throttling.AnonRateThrottle()
+        throttle.rate = '4/min'
+        throttle.num_requests, throttle.duration = throttle.parse_rate(
+            throttle.rate)
+        throttle.timer = lambda: now
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        return throttle.allow_request(request, None), throttle
+
+    def test_limit_spans_windows(self):
+        # Four requests at the end of one window...
+        for second in range(56, 60):
+            self.assertTrue(self.allow(60 * 1000 + second)[0])
+        allowed, throttle = self.allow(60 * 1000 + 59)
+        self.assertFalse(allowed)
+        self.assertGreater(throttle.wait(), 0)
+
+        # ...still count for half of the limit half way through the next.
+        self.assertTrue(self.allow(60 * 1001 + 30)[0])
+        self.assertTrue(self.allow(60 * 1001 + 30)[0])
+        self.assertFalse(self.allow(60 * 1001 + 30)[0])
+        self.assertEqual(models.ThrottleCounter.objects.get(
+            window=1001).count, 2)
+
+        # Three quarters of the way through, one more request is allowed.
+        self.assertTrue(self.allow(60 * 1001 + 45)[0])
+        self.assertFalse(self.allow(60 * 1001 + 46)[0])
+
+    def test_window_started_by_another_worker(self):
+        # Another worker creates the window's counter between this
+        # worker's UPDATE and its read of the counts.
+        increment = throttling.SlidingWindowThrottle.increment
+
+        def racing_increment(throttle):
+            if not models.ThrottleCounter.objects.exists():
+                models.ThrottleCounter.objects.create(
+                    key=throttle.key, window=throttle.window)
+                return 0
+            return increment(throttle)
+
+        with mock.patch.object(throttling.SlidingWindowThrottle,
+                               'increment', racing_increment):
+            self.assertTrue(self.allow(60 * 1000)[0])
+        self.assertEqual(models.ThrottleCounter.objects.get().count, 1)
+
+    def test_old_windows_are_removed(self):
+        self.allow(60 * 1000)
+        self.allow(60 * 1003)
+        self.assertEqual(
+            list(models.ThrottleCounter.objects.values_list(
+                'window', flat=True)),
+            [1003]
+        )
+
+
+class CachedTokenAuthenticationTests(CourseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        token_cache.clear()
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Token {}'.format(self.token.key))
+        self.url = reverse('apiv2:review-list')
+
+    def post_review(self, email):
+        return self.client.post(self.url, {
+            'name': 'Learner', 'email': email, 'rating': 4,
+            'course': self.course.pk,
+        })
+
+    def test_token_lookup_is_cached(self):
+        self.assertEqual(self.post_review('one@example.com').status_code, 201)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(
+                self.post_review('two@example.com').status_code, 201)
+        self.assertFalse(any('authtoken_token' in query['sql']
+                             for query in queries))
+
+    def test_deactivated_user_is_rejected(self):
+        self.post_review('one@example.com')
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.post_review('two@example.com').status_code, 401)
+
+    def test_deleted_token_is_rejected(self):
+        self.post_review('one@example.com')
+        self.token.delete()
+        self.assertEqual(self.post_review('two@example.com').status_code, 401)
+
+
+class CachedPermissionsTests(CourseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.group = Group.objects.create(name='Editors')
+        self.user.groups.add(self.group)
+
+    def create_course(self, number):
+        # Authenticate a fresh user object for each request, as
+        # `ModelBackend` caches permissions on the user object itself.
+        self.client.force_authenticate(User.objects.get(pk=self.user.pk))
+        return self.client.post(reverse('apiv2:course-list'), {
+            'title': 'Course {}'.format(number),
+            'url': 'https://example.com/{}'.format(number),
+        })
+
+    def test_snapshot_follows_group_changes(self):
+        self.assertEqual(self.create_course(1).status_code, 403)
+
+        self.group.permissions.add(
+            Permission.objects.get(codename='add_course'))
+        self.assertEqual(self.create_course(2).status_code, 201)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.create_course(3).status_code, 201)
+        self.assertFalse(any('auth_permission' in query['sql']
+                             for query in queries))
+
+        self.user.groups.remove(self.group)
+        self.assertEqual(self.create_course(4).status_code, 403)
+
+    def test_snapshot_expires(self):
+        # A change made by another process doesn't bump the versions in
+        # this process's cache, but the snapshot still expires.
+        self.assertEqual(self.create_course(1).status_code, 403)
+        with mock.patch('courses.permissions.bump_global_version'):
+            self.group.permissions.add(
+                Permission.objects.get(codename='add_course'))
+        self.assertEqual(self.create_course(2).status_code, 403)
+        later = time.monotonic() + 31
+        with mock.patch('courses.permissions.time') as mock_time:
+            mock_time.monotonic.return_value = later
+            self.assertEqual(self.create_course(3).status_code, 201)
+
+
+class SparseFieldsTests(CourseAPITestCase):
+    def test_course_fields(self):
+        self.create_review()
+        url = reverse('courses:course_list')
+        self.client.get(url)
+        # The throttles, the count, and the page of courses, without the
+        # recent reviews prefetch, as `reviews` isn't requested.
+        with self.assertNumQueries(4):
+            resp = self.client.get(url, {'fields': 'id,title,average_rating'})
+        self.assertEqual(resp.data['results'][0], {
+            'id': self.course.pk,
+            'title': self.course.title,
+            'average_rating': 4,
+        })
+
+    def test_review_fields(self):
+        review = self.create_review()
+        resp = self.client.get(
+            reverse('courses:review_list',
+                    kwargs={'course_pk': self.course.pk}),
+            {'fields': 'id,rating'}
+        )
+        self.assertEqual(resp.data['results'],
+                         [{'id': review.pk, 'rating': 4}])
+
+    def test_writes_ignore_fields(self):
+        self.client.force_authenticate(self.user)
+        resp = self.client.post(
+            reverse('apiv2:review-list') + '?fields=id',
+            {'name': 'Learner', 'email': 'new@example.com', 'rating': 5,
+             'course': self.course.pk}
+        )
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data['rating'], 5)
+
+
+class FastListTests(CourseAPITestCase):
+    def assertSameJSON(self, resp, serializer_class, queryset):
+        # Serialize the same objects, in the same order, with the
+        # serializer.
+        objects = queryset.in_bulk(
+            [item['id'] for item in resp.data['results']])
+        expected = serializer_class(
+            [objects[item['id']] for item in resp.data['results']],
+            many=True,
+            context={'request': resp.renderer_context['request']},
+        ).data
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(resp.data['results']),
+                         renderer.render(expected))
+
+    def test_course_list_matches_serializer(self):
+        for number in range(3):
+            self.create_review(email='{}@example.com'.format(number),
+                               rating=number + 2)
+        models.Course.objects.create(title='No reviews',
+                                     url='https://example.com/none')
+        resp = self.client.get(reverse('courses:course_list'))
+        self.assertEqual(resp.data['results'][0]['average_rating'], 3)
+        self.assertSameJSON(resp, serializers.CourseSerializer,
+                            models.Course.objects.all())
+
+    def test_review_list_matches_serializer(self):
+        for number in range(3):
+            self.create_review(email='{}@example.com'.format(number))
+        resp = self.client.get(reverse('courses:review_list',
+                                       kwargs={'course_pk': self.course.pk}))
+        self.assertNotIn('email', resp.data['results'][0])
+        self.assertSameJSON(resp, serializers.ReviewSerializer,
+                            models.Review.objects.all())
+
+
+class ReviewExportTests(CourseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+        other = models.Course.objects.create(
+            title='Python Basics',
+            url='https://teamtreehouse.com/library/python-basics'
+        )
+        self.reviews = [self.create_review(email='{}@example.com'.format(n))
+                        for n in range(3)]
+        self.create_review(course=other)
+
+    def export(self, **params):
+        resp = self.client.get(reverse('apiv2:review-export'), params)
+        self.assertEqual(resp.status_code, 200)
+        return b''.join(resp.streaming_content).decode()
+
+    def test_ndjson(self):
+        lines = self.export(course=self.course.pk).splitlines()
+        self.assertEqual(
+            [json.loads(line)['id'] for line in lines],
+            [review.pk for review in self.reviews]
+        )
+        self.assertNotIn('email', json.loads(lines[0]))
+
+    def test_csv(self):
+        rows = list(csv.reader(StringIO(self.export(output='csv'))))
+        self.assertEqual(rows[0], ['id', 'course', 'name', 'comment',
+                                   'rating', 'created_at'])
+        self.assertEqual(len(rows), 5)
+
+    def test_csv_escapes_formulas(self):
+        models.Review.objects.filter(pk=self.reviews[0].pk).update(
+            comment='=HYPERLINK("https://example.com")', name='@Learner')
+        rows = list(csv.reader(StringIO(self.export(
+            output='csv', course=self.course.pk))))
+        self.assertEqual(rows[1][2], "'@Learner")
+        self.assertEqual(rows[1][3], '\'=HYPERLINK("https://example.com")')
+
+    def test_date_range(self):
+        self.assertEqual(self.export(until='2000-01-01'), '')
+        self.assertEqual(len(self.export(since='2000-01-01').splitlines()), 4)
+        resp = self.client.get(reverse('apiv2:review-export'),
+                               {'since': 'yesterday'})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_bad_course(self):
+        for course in ('abc', '\u00b2'):
+            resp = self.client.get(reverse('apiv2:review-export'),
+                                   {'course': course})
+            self.assertEqual(resp.status_code, 400)
+
+
+class RatingHistogramTests(CourseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def test_histogram_follows_review_writes(self):
+        review = self.create_review(rating=2)
+        self.create_review(email='other@example.com', rating=5)
+        review.rating = 4
+        review.save()
+        resp = self.client.get(
+            reverse('apiv2:course-histogram', kwargs={'pk': self.course.pk}))
+        self.assertEqual(resp.data['histogram'],
+                         {'1': 0, '2': 0, '3': 0, '4': 1, '5': 1})
+        self.assertEqual(resp.data['reviews_count'], 2)
+        # Two reviews averaging 4.5, plus five prior ratings of 3.
+        self.assertAlmostEqual(resp.data['bayesian_score'], 24 / 7)
+
+    def test_histogram_of_missing_course(self):
+        for pk in ('abc', self.course.pk + 1):
+            resp = self.client.get(
+                reverse('apiv2:course-histogram', kwargs={'pk': pk}))
+            self.assertEqual(resp.status_code, 404)
+
+    def test_top_rated_ranks_by_bayesian_score(self):
+        # One five-star review ranks below many four-star reviews.
+        lucky = models.Course.objects.create(
+            title='Lucky', url='https://example.com/lucky')
+        self.create_review(course=lucky, rating=5)
+        for number in range(10):
+            self.create_review(email='{}@example.com'.format(number))
+        unrated = models.Course.objects.create(
+            title='Unrated', url='https://example.com/unrated')
+
+        resp = self.client.get(reverse('apiv2:course-top-rated'),
+                               {'page_size': 2})
+        ids = [course['id'] for course in resp.data['results']]
+        resp = self.client.get(resp.data['next'])
+        ids += [course['id'] for course in resp.data['results']]
+        self.assertEqual(ids, [self.course.pk, lucky.pk, unrated.pk])
+
+    def test_top_rated_pages_through_ties(self):
+        # Courses without reviews all tie at the prior mean.
+        models.Course.objects.bulk_create([
+            models.Course(title='Course {}'.format(number),
+                          url='https://example.com/{}'.format(number))
+            for number in range(24)
+        ])
+        expected = list(models.Course.objects.order_by(
+            '-bayesian_score', '-id').values_list('pk', flat=True))
+        url = reverse('apiv2:course-top-rated') + '?page_size=7'
+        ids = []
+        while url:
+            resp = self.client.get(url)
+            ids += [course['id'] for course in resp.data['results']]
+            previous, url = resp.data['previous'], resp.data['next']
+        self.assertEqual(ids, expected)
+
+        # The previous link of the last page leads back to the page before.
+        resp = self.client.get(previous)
+        self.assertEqual([course['id'] for course in resp.data['results']],
+                         expected[14:21])
+
+
+class ConditionalCourseTests(CourseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.url = reverse('courses:course_detail',
+                           kwargs={'pk': self.course.pk})
+
+    def test_detail_etag_follows_version(self):
+        resp = self.client.get(self.url)
+        etag = resp['ETag']
+        self.assertIn('Last-Modified', resp)
+
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+
+        # Served from the cache: only the throttles and the version are
+        # queried.
+        with self.assertNumQueries(3):
+            resp = self.client.get(self.url)
+        self.assertEqual(resp.data['title'], self.course.title)
+
+        self.create_review()
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp['ETag'], etag)
+        self.assertEqual(resp.data['reviews_count'], 1)
+
+        self.course.title = 'Python Collections (Retired)'
+        self.course.save()
+        self.assertEqual(self.client.get(self.url).data['title'],
+                         self.course.title)
+
+    def test_detail_of_missing_course(self):
+        self.client.force_authenticate(self.user)
+        for url in (reverse('courses:course_detail', kwargs={'pk': 'abc'}),
+                    reverse('apiv2:course-detail', kwargs={'pk': 'abc'})):
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_rebuild_invalidates_cached_detail(self):
+        self.create_review()
+        resp = self.client.get(self.url)
+        etag = resp['ETag']
+        self.assertEqual(resp.data['reviews_count'], 1)
+
+        # `bulk_create()` doesn't update the totals, so they drift from the
+        # reviews until they are rebuilt.
+        models.Review.objects.bulk_create([models.Review(
+            course=self.course, name='Learner', email='other@example.com',
+            rating=2)])
+        call_command('rebuild_course_ratings', stdout=StringIO())
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp['ETag'], etag)
+        self.assertEqual(resp.data['reviews_count'], 2)
+
+    def test_list_etag(self):
+        url = reverse('courses:course_list')
+        resp = self.client.get(url)
+        etag = resp['ETag']
+        # A hash of the bytes that were sent.
+        self.assertEqual(etag, '"courses-{}"'.format(
+            hashlib.md5(resp.content).hexdigest()))
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+
+        self.create_review()
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+
+    def test_top_rated_etag_reads_only_the_page(self):
+        self.client.force_authenticate(self.user)
+        url = reverse('apiv2:course-top-rated')
+        etag = self.client.get(url)['ETag']
+        # The user throttle, the page of courses, and their recent reviews,
+        # with no query over the whole table for the ETag.
+        with self.assertNumQueries(3):
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+
+
+class CourseBatchTests(CourseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+        self.courses = [self.course] + [
+            models.Course.objects.create(
+                title='Course {}'.format(number),
+                url='https://example.com/{}'.format(number))
+            for number in range(3)
+        ]
+        for course in self.courses:
+            self.create_review(course=course)
+
+    def test_courses_are_returned_in_requested_order(self):
+        ids = [self.courses[2].pk, self.courses[0].pk, 999,
+               self.courses[3].pk]
+        # Start the throttle's window.
+        self.client.get(reverse('apiv2:course-list'))
+        # The user throttle, the courses, and their reviews.
+        with self.assertNumQueries(3):
+            resp = self.client.get(reverse('apiv2:course-list'),
+                                   {'ids': ','.join(map(str, ids))})
+        self.assertEqual([course['id'] for course in resp.data],
+                         [ids[0], ids[1], ids[3]])
+        self.assertEqual(len(resp.data[0]['reviews']), 1)
+
+    def test_ids_are_bounded(self):
+        resp = self.client.get(reverse('apiv2:course-list'),
+                               {'ids': ','.join(map(str, range(1, 102)))})
+        self.assertEqual(resp.status_code, 400)
+        for ids in ('1,x', '1,\u00b2'):
+            resp = self.client.get(reverse('apiv2:course-list'), {'ids': ids})
+            self.assertEqual(resp.status_code, 400)
+        # Repeated IDs count towards the limit, as they are still parsed.
+        resp = self.client.get(reverse('apiv2:course-list'),
+                               {'ids': ','.join(['1'] * 101)})
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.get(reverse('apiv2:course-list'),
+                               {'ids': '{0},{0}'.format(self.course.pk)})
+        self.assertEqual(len(resp.data), 1)
+
+
+class CompressionTests(CourseAPITestCase):
+    def test_renderer_matches_json_renderer(self):
+        data = {'title': 'Caf\u00e9 \u2028', 'rating': 4.5, 'ids': [1, 2],
+                'link': None,
+                'created_at': datetime.datetime(2026, 10, 19, 1, 2, 3, 400000,
+                                                tzinfo=datetime.timezone.utc),
+                'day': datetime.date(2026, 10, 19)}
+        self.assertEqual(renderers.FastJSONRenderer().render(data),
+                         JSONRenderer().render(data))
+        # Large floats are written as `1e20` rather than `1e+20`.
+        data = {'score': 1e20, 'small': 1e-7}
+        self.assertEqual(
+            json.loads(renderers.FastJSONRenderer().render(data)),
+            json.loads(JSONRenderer().render(data)))
+
+    def test_large_responses_are_compressed(self):
+        for number in range(20):
+            models.Course.objects.create(
+                title='Course {}'.format(number),
+                url='https://example.com/{}'.format(number))
+        url = reverse('courses:course_list')
+        resp = self.client.get(url, {'page_size': 50},
+                               HTTP_ACCEPT_ENCODING='gzip')
+        self.assertIn(resp['Content-Encoding'], ('gzip', 'br'))
+
+        # Too small to be worth compressing.
+        resp = self.client.get(url, {'page_size': 1},
+                               HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(resp.has_header('Content-Encoding'))
+
+
+class BenchmarkTests(TestCase):
+    def test_run_scale_reports_every_endpoint(self):
+        report = benchmarks.run_scale(reviews=30, reviews_per_course=10,
+                                      requests=2, concurrency=1)
+        self.assertEqual(report['reviews'], 30)
+        self.assertEqual(report['courses'], 3)
+        for name, result in report['endpoints'].items():
+            self.assertEqual(result['errors'], 0, name)
+            self.assertEqual(result['requests'], 2)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+        user = User.objects.get(username='benchmark')
+        self.assertFalse(user.is_superuser)
+        self.assertTrue(user.has_perm('courses.change_course'))
@@ -0,0 +1,112 @@
+import math
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Subquery, Value
+from django.db.models.functions import Ceil, Coalesce
+
+from rest_framework import throttling
+
+from . import models
+
+
+class SlidingWindowThrottle(throttling.SimpleRateThrottle):
+    """
+    Throttles with a sliding window counter stored in the
+    `ThrottleCounter` table, rather than DRF's default list of request
+    timestamps in the (per process) cache.
+
+    Only the counts for the current and previous fixed windows are kept.
+    The number of requests in the last `duration` seconds is estimated as
+    the current window's count plus the previous window's count, weighted
+    by how much of the previous window is still inside the sliding window.
+    Each allowed request costs a single conditional UPDATE, however high
+    the rate is, and the UPDATE only succeeds while the count is under the
+    limit, so concurrent workers can't admit more requests than allowed.
+    """
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        self.window, elapsed = divmod(self.now, self.duration)
+        self.window = int(self.window)
+        self.weight = 1 - elapsed / self.duration
+
+        if self.increment():
+            return self.throttle_success()
+
+        # Either the limit has been reached, or the current window's counter
+        # didn't exist when the UPDATE ran. Another worker may have created
+        # it since, so decide from the counts rather than from whether the
+        # counter exists now.
+        counts = dict(models.ThrottleCounter.objects.filter(
+            key=self.key, window__in=[self.window - 1, self.window]
+        ).values_list('window', 'count'))
+        self.previous = counts.get(self.window - 1, 0)
+        self.current = counts.get(self.window)
+        if self.current is None:
+            self.start_window()
+            self.current = 0
+        allowed = self.num_requests - math.ceil(self.previous * self.weight)
+        if self.current < allowed and self.increment():
+            return self.throttle_success()
+        return self.throttle_failure()
+
+    def increment(self):
+        """
+        Counts a request in the current window with one UPDATE, as long as
+        the current window's count is below the limit left over by the
+        share of the previous window still inside the sliding window.
+        Returns whether the request was counted.
+        """
+        previous = Coalesce(Subquery(models.ThrottleCounter.objects.filter(
+            key=self.key, window=self.window - 1
+        ).values('count')[:1]), 0)
+        allowed = self.num_requests - Ceil(previous * Value(self.weight))
+        return models.ThrottleCounter.objects.filter(
+            key=self.key, window=self.window, count__lt=allowed
+        ).update(count=F('count') + 1)
+
+    def start_window(self):
+        # Windows before the previous one no longer count towards the
+        # limit.
+        models.ThrottleCounter.objects.filter(
+            key=self.key, window__lt=self.window - 1
+        ).delete()
+        try:
+            with transaction.atomic():
+                models.ThrottleCounter.objects.create(
+                    key=self.key, window=self.window
+                )
+        except IntegrityError:
+            # Another worker started the window first.
+            pass
+
+    def throttle_success(self):
+        return True
+
+    def wait(self):
+        """Returns the number of seconds until a request would be allowed."""
+        elapsed = (1 - self.weight) * self.duration
+        if self.current < self.num_requests:
+            if not self.previous:
+                # Lost a race with other workers for the last requests.
+                return self.duration - elapsed
+            # Wait for enough of the previous window to slide out.
+            needed = 1 - (self.num_requests - self.current - 1) / self.previous
+            return max(needed * self.duration - elapsed, 0)
+        # Wait for the next window, once enough of this one slides out.
+        needed = 1 - (self.num_requests - 1) / self.current
+        return self.duration - elapsed + needed * self.duration
+
+
+class AnonRateThrottle(SlidingWindowThrottle, throttling.AnonRateThrottle):
+    pass
+
+
+class UserRateThrottle(SlidingWindowThrottle, throttling.UserRateThrottle):
+    pass
@@ -1,33 +1,57 @@
+from django.db.models import Case, When
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 
 from rest_framework import generics
 from rest_framework import mixins
 from rest_framework import permissions
+from rest_framework import status
 from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
+from . import caching
+from . import exports
+from . import fastpath
 from . import models
+from . import pagination
+from . import permissions as course_permissions
 from . import serializers
 
 
+class CourseQuerysetMixin:
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Fetch the recent review IDs for the whole page in one query, unless
+        # `?fields=` leaves out the `reviews` field.
+        requested = serializers.get_requested_fields(self.request)
+        if requested is None or 'reviews' in requested:
+            queryset = queryset.with_recent_reviews()
+        return queryset
+
+
 # Extends a generic API view rather than the standard `APIView`.
-class ListCreateCourse(generics.ListCreateAPIView):
+class ListCreateCourse(CourseQuerysetMixin, caching.CachedCourseMixin,
+                       fastpath.FastListMixin, generics.ListCreateAPIView):
     queryset = models.Course.objects.all()
     # Specifies which serializer will be used on the queryset.
     serializer_class = serializers.CourseSerializer
 
 
-class RetrieveUpdateDestroyCourse(generics.RetrieveUpdateDestroyAPIView):
+class RetrieveUpdateDestroyCourse(CourseQuerysetMixin,
+                                  caching.CachedCourseMixin,
+                                  generics.RetrieveUpdateDestroyAPIView):
     queryset = models.Course.objects.all()
     serializer_class = serializers.CourseSerializer
 
 
 # v1 API
 
-class ListCreateReview(generics.ListCreateAPIView):
+class ListCreateReview(fastpath.FastListMixin, generics.ListCreateAPIView):
     queryset = models.Review.objects.all()
     serializer_class = serializers.ReviewSerializer
+    pagination_class = pagination.ReviewCursorPagination
 
     # Override the default `get_queryset` method to have it use `course_pk`.
     def get_queryset(self):
@@ -71,34 +95,125 @@ class SuperUserCanDelete(permissions.BasePermission):
         return False
 
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(CourseQuerysetMixin, caching.CachedCourseMixin,
+                    fastpath.FastListMixin, viewsets.ModelViewSet):
     # This will override the default permissions in `settings.py`.
     # The permission checks will run in the order they are listed.
     # Here, a non-superuser will not be able to delete a course,
     # even if they have that ability via Django permissions.
     permission_classes = (
         SuperUserCanDelete,
-        permissions.DjangoModelPermissions
+        # Checks `DjangoModelPermissions` against a cached snapshot of the
+        # user's permissions.
+        course_permissions.CachedDjangoModelPermissions
     )
     queryset = models.Course.objects.all()
     serializer_class = serializers.CourseSerializer
 
+    # Pagination classes for actions that shouldn't use `pagination_class`.
+    action_pagination_classes = {
+        'reviews': pagination.ReviewCursorPagination,
+        'top_rated': pagination.TopRatedCursorPagination,
+    }
+
+    # `paginate_queryset()` uses this paginator instance. A new one is
+    # created for every request, so page sizes chosen per request (through
+    # `?page_size=`) never leak into other requests or threads.
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.get_requested_ids() is not None:
+                # Batches of courses fetched with `?ids=` aren't paginated.
+                self._paginator = None
+            elif self.action in self.action_pagination_classes:
+                self._paginator = self.action_pagination_classes[
+                    self.action]()
+        return super().paginator
+
+    # Most courses that can be fetched at once with `?ids=`.
+    max_batch_ids = 100
+
+    # Clients can fetch a batch of courses in one request with `?ids=`
+    # (e.g., `/api/v2/courses/?ids=3,1,2`). The courses are returned in the
+    # requested order, and IDs that don't exist are left out.
+    def get_requested_ids(self):
+        if self.action != 'list' or 'ids' not in self.request.query_params:
+            return None
+        if not hasattr(self, '_requested_ids'):
+            # Check the length first, so that a long `ids=` isn't parsed
+            # before being rejected.
+            values = self.request.query_params['ids'].split(',')
+            if len(values) > self.max_batch_ids:
+                raise ValidationError({'ids': 'Enter at most {} IDs.'.format(
+                    self.max_batch_ids)})
+            # Not `str.isdigit()`, which is also true for digits such as
+            # `²` that `int()` rejects.
+            if not all(value.strip().isdecimal() for value in values):
+                raise ValidationError({'ids': 'Enter a list of IDs.'})
+            # Drop repeated IDs, keeping the first position of each.
+            self._requested_ids = list(dict.fromkeys(map(int, values)))
+        return self._requested_ids
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        ids = self.get_requested_ids()
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids).order_by(Case(
+                *[When(pk=pk, then=position)
+                  for position, pk in enumerate(ids)]
+            ))
+        return queryset
+
+    # The leaderboard of courses, ranked by their stored Bayesian scores
+    # (e.g., `/api/v2/courses/top-rated/`).
+    @action(detail=False, methods=['get'], url_path='top-rated')
+    def top_rated(self, request):
+        # Pages with `action_pagination_classes['top_rated']`.
+        return self.list(request)
+
+    # The number of reviews with each star rating, read from the counts
+    # stored on the course (e.g., `/api/v2/courses/1/histogram/`).
+    @action(detail=True, methods=['get'])
+    def histogram(self, request, pk=None):
+        # Not `self.get_object()`, which would also fetch recent reviews
+        # through `get_queryset()`. DRF's `get_object_or_404` returns a 404
+        # for a malformed `pk` (e.g., `abc`) rather than raising an error.
+        course = generics.get_object_or_404(models.Course.objects.all(), pk=pk)
+        self.check_object_permissions(request, course)
+        return Response({
+            'histogram': course.rating_histogram,
+            'reviews_count': course.review_count,
+            'average_rating': serializers.round_rating(course.average_rating),
+            'bayesian_score': course.bayesian_score,
+        })
+
     # This viewset method only applies to the detail view (rather than
     # the list view), and it will only work for GET requests.
     @action(detail=True, methods=['get'])
     def reviews(self, request, pk=None):
-        # Calls the `pagination_class` set in `settings.py` with the
-        # specified page size.
-        self.pagination_class.page_size = 1
+        # Pages with `action_pagination_classes['reviews']`. Don't change
+        # `page_size` on the pagination class here: it is shared by every
+        # request in the process.
         reviews = models.Review.objects.filter(course_id=pk)
 
+        plan = fastpath.get_plan(
+            serializers.ReviewSerializer,
+            self.get_list_plan_fields(),
+        )
+        if plan is not None:
+            return self.fast_list(reviews, plan)
+
         page = self.paginate_queryset(reviews)
 
+        # Pass the request along so that `?fields=` applies to the reviews.
+        context = self.get_serializer_context()
         if page is not None:
-            serializer = serializers.ReviewSerializer(page, many=True)
+            serializer = serializers.ReviewSerializer(
+                page, many=True, context=context)
             return self.get_paginated_response(serializer.data)
 
-        serializer = serializers.ReviewSerializer(reviews, many=True)
+        serializer = serializers.ReviewSerializer(
+            reviews, many=True, context=context)
         return Response(serializer.data)
 
 
@@ -128,3 +243,71 @@ class ReviewViewSet(mixins.CreateModelMixin,
                     viewsets.GenericViewSet):
     queryset = models.Review.objects.all()
     serializer_class = serializers.ReviewSerializer
+    # Maximum number of reviews accepted by one `bulk` request.
+    bulk_max_reviews = 1000
+    # Number of reviews fetched and serialized at a time by `export`.
+    export_chunk_size = 2000
+
+    # With `?upsert=true`, creating a review for an (email, course) pair
+    # that has already been reviewed replaces that review in a single
+    # statement, rather than failing with a uniqueness error.
+    def get_upsert(self):
+        return self.request.query_params.get('upsert') in ('1', 'true')
+
+    def get_serializer_class(self):
+        if self.action == 'create' and self.get_upsert():
+            return serializers.UpsertReviewSerializer
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['upsert'] = self.get_upsert()
+        return context
+
+    # Streams every review, optionally filtered with `?course=`, `?since=`
+    # and `?until=` (ISO 8601 dates or datetimes), as newline-delimited
+    # JSON, or as CSV with `?output=csv` (e.g.,
+    # `/api/v2/reviews/export/?course=1&since=2016-01-01&output=csv`).
+    # Rows are read in chunks and written out as they are serialized, so
+    # memory use doesn't grow with the number of reviews.
+    @action(detail=False, methods=['get'],
+            permission_classes=[permissions.IsAuthenticated])
+    def export(self, request):
+        output = request.query_params.get('output', 'ndjson')
+        if output not in exports.CONTENT_TYPES:
+            raise ValidationError({'output': 'Must be one of: {}.'.format(
+                ', '.join(exports.CONTENT_TYPES))})
+        requested = serializers.get_requested_fields(request)
+        plan = fastpath.get_plan(
+            serializers.ReviewSerializer,
+            None if requested is None else frozenset(requested),
+        )
+        rows = exports.filter_reviews(
+            models.Review.objects.all(), request.query_params
+        ).order_by('pk').values(*plan.columns).iterator(
+            chunk_size=self.export_chunk_size
+        )
+        response = StreamingHttpResponse(
+            exports.stream(rows, plan, request, output),
+            content_type=exports.CONTENT_TYPES[output],
+        )
+        response['Content-Disposition'] = (
+            'attachment; filename="reviews.{}"'.format(output))
+        return response
+
+    # Creates a list of reviews in one request and one transaction (e.g.,
+    # `POST /api/v2/reviews/bulk/`). If any review is invalid, nothing is
+    # saved and the response lists the errors for each review in order.
+    # Also accepts `?upsert=true`.
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        serializer = serializers.BulkReviewSerializer(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=self.bulk_max_reviews,
+            context=self.get_serializer_context(),
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -47,6 +47,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Compresses API responses; placed before any middleware that reads or
+    # changes the response body.
+    'courses.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -128,20 +131,49 @@ STATIC_URL = '/static/'
 # REST Framework - contains all DRF settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        # Caches the token lookups made by `TokenAuthentication`.
+        'courses.authentication.CachedTokenAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        # Uses `orjson` when it is installed.
+        'courses.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         # Unauthenticated users can only read data.
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # Review listings use `courses.pagination.ReviewCursorPagination`.
+    'DEFAULT_PAGINATION_CLASS': 'courses.pagination.CoursePagination',
     'PAGE_SIZE': 5,
     'DEFAULT_THROTTLE_CLASSES': (
-        'rest_framework.throttling.AnonRateThrottle', # Non-authenticated users
-        'rest_framework.throttling.UserRateThrottle', # Authenticated users
+        # Counted in the database, so the rates apply across all of the
+        # worker processes rather than to each one.
+        'courses.throttling.AnonRateThrottle', # Non-authenticated users
+        'courses.throttling.UserRateThrottle', # Authenticated users
     ),
     'DEFAULT_THROTTLE_RATES': {
         'anon': '500/day',
         'user': '100/hour',
     }
 }
+
+# The default cache holds the permission versions read by
+# `courses.permissions` and cached course representations. `LocMemCache` is
+# per process: with several worker processes, a permission change made in
+# one of them only reaches the others when their permission snapshots
+# expire (see `PERMISSION_SNAPSHOT_TTL`). Use a shared backend (e.g.,
+# memcached or Redis) for permission changes to apply everywhere at once.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Most seconds a worker process keeps using a snapshot of a user's
+# permissions before loading them again.
+PERMISSION_SNAPSHOT_TTL = 30
+
+# Responses smaller than this many bytes aren't compressed by
+# `courses.middleware.CompressionMiddleware`.
+COMPRESSION_MIN_SIZE = 1024
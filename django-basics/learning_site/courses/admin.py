@@ -1,11 +1,13 @@
 from django.contrib import admin
+from django.utils import timezone
 from datetime import date
 
 from . import models
 
 
 def make_published(modeladmin, request, queryset):
-    queryset.update(status='p', published=True)
+    # `update()` skips `save()`, so `auto_now` fields must be set by hand.
+    queryset.update(status='p', published=True, updated_at=timezone.now())
 
 
 # The message users will see when using the "Action" dropdown menu
@@ -87,7 +89,12 @@ class QuestionAdmin(admin.ModelAdmin):
 
 
 class QuizAdmin(admin.ModelAdmin):
-    fields = ['course', 'title', 'description', 'order', 'total_questions']
+    fields = ['course', 'title', 'description', 'order', 'total_questions',
+              'question_count']
+    readonly_fields = ['question_count']
+    list_display = ['title', 'course', 'question_count', 'total_questions',
+                    'missing_questions']
+    list_select_related = ['course']
 
 
 class TextAdmin(admin.ModelAdmin):
@@ -110,9 +117,55 @@ class TextAdmin(admin.ModelAdmin):
     )
 
 
+class StatsAdmin(admin.ModelAdmin):
+    # Stats are only written by the `rollup_quiz_stats` command.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class QuizStatsAdmin(StatsAdmin):
+    list_display = ['quiz', 'attempts', 'average_score']
+    list_select_related = ['quiz']
+
+
+class QuestionStatsAdmin(StatsAdmin):
+    # Hardest questions first. Sorting on the indexed `correct_rate` column
+    # keeps this report fast however long the attempt history gets.
+    list_display = ['question', 'quiz', 'responses', 'correct_rate']
+    list_select_related = ['question__quiz']
+    ordering = ['correct_rate']
+
+    def quiz(self, obj):
+        return obj.question.quiz
+
+
+class AnswerStatsAdmin(StatsAdmin):
+    list_display = ['answer', 'question', 'picks', 'pick_rate']
+    list_select_related = ['answer__question__stats']
+
+    def question(self, obj):
+        return obj.answer.question
+
+    def pick_rate(self, obj):
+        """Share of the question's responses that picked this answer."""
+        stats = getattr(obj.answer.question, 'stats', None)
+        if stats is None or not stats.responses:
+            return None
+        return obj.picks / stats.responses
+
+
 admin.site.register(models.Course, CourseAdmin)
 admin.site.register(models.Text, TextAdmin)
 admin.site.register(models.Quiz, QuizAdmin)
 admin.site.register(models.MultipleChoiceQuestion, QuestionAdmin)
 admin.site.register(models.TrueFalseQuestion, QuestionAdmin)
 admin.site.register(models.Answer)
+admin.site.register(models.QuizStats, QuizStatsAdmin)
+admin.site.register(models.QuestionStats, QuestionStatsAdmin)
+admin.site.register(models.AnswerStats, AnswerStatsAdmin)
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class CoursesConfig(AppConfig):
     name = 'courses'
+
+    def ready(self):
+        # Import the signal handlers so that they are connected once the
+        # app registry is ready.
+        from . import signals
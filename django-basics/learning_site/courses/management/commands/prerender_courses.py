@@ -0,0 +1,175 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.http import Http404
+from django.test import RequestFactory
+from django.urls import reverse
+
+from courses import models, views
+
+# Records the `updated_at` value of every course at the time it was last
+# rendered, so that later runs can skip courses that have not changed.
+MANIFEST_NAME = '.prerender.json'
+
+
+def course_directory(target, course_pk):
+    url = reverse('courses:detail', kwargs={'pk': course_pk})
+    return os.path.join(target, url.strip('/'))
+
+
+def render_page(factory, target, url, view, **kwargs):
+    """Renders a read view as an anonymous visitor and writes the HTML to
+    `<target>/<url>/index.html`. Returns the path of the written file, or
+    `None` if the page didn't render (e.g., its course was unpublished or
+    deleted during the run), in which case nothing is written."""
+    request = factory.get(url)
+    request.user = AnonymousUser()
+    try:
+        response = view(request, **kwargs)
+    except Http404:
+        return None
+    if response.status_code != 200:
+        return None
+
+    path = os.path.join(target, url.strip('/'), 'index.html')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write to a temporary file first so that the proxy never serves a
+    # partially written page.
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as page:
+        page.write(response.content)
+    os.replace(temp_path, path)
+    return path
+
+
+def render_course(course_pk, target):
+    """Renders a course and all of its steps, and returns the number of
+    pages written, or `None` if the course itself no longer renders. Runs
+    inside a worker process, so it only receives (and returns) plain,
+    picklable values."""
+    factory = RequestFactory()
+    course_page = render_page(
+        factory, target,
+        reverse('courses:detail', kwargs={'pk': course_pk}),
+        views.course_detail, pk=course_pk,
+    )
+    if course_page is None:
+        remove_course(target, course_pk)
+        return None
+    written = {course_page}
+
+    steps = (
+        ('courses:text', views.text_detail, models.Text),
+        ('courses:quiz', views.quiz_detail, models.Quiz),
+    )
+    for url_name, view, model in steps:
+        step_pks = model.objects.filter(
+            course_id=course_pk
+        ).values_list('pk', flat=True)
+        for step_pk in step_pks:
+            kwargs = {'course_pk': course_pk, 'step_pk': step_pk}
+            path = render_page(
+                factory, target, reverse(url_name, kwargs=kwargs),
+                view, **kwargs
+            )
+            if path is not None:
+                written.add(path)
+
+    # Remove pages for steps that have been deleted since the last run, or
+    # that no longer render.
+    for root, dirs, files in os.walk(course_directory(target, course_pk)):
+        for name in files:
+            path = os.path.join(root, name)
+            if path not in written:
+                os.remove(path)
+    return len(written)
+
+
+def remove_course(target, course_pk):
+    for root, dirs, files in os.walk(
+            course_directory(target, course_pk), topdown=False):
+        for name in files:
+            os.remove(os.path.join(root, name))
+        for name in dirs:
+            os.rmdir(os.path.join(root, name))
+
+
+def setup_worker():
+    # Worker processes that are spawned (rather than forked) start with an
+    # unconfigured Django.
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Renders published courses and their steps to static HTML files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', help='Directory to write pages to.')
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count(),
+            help='Number of worker processes used for rendering.',
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help=('Re-render every published course, e.g., after a change '
+                  'to a shared template such as `layout.html`.'),
+        )
+
+    def handle(self, *args, **options):
+        target = options['target']
+        manifest_path = os.path.join(target, MANIFEST_NAME)
+        manifest = {}
+        if not options['force'] and os.path.exists(manifest_path):
+            with open(manifest_path) as manifest_file:
+                manifest = json.load(manifest_file)
+
+        published = {
+            str(pk): updated_at.isoformat()
+            for pk, updated_at in models.Course.objects.filter(
+                published=True
+            ).values_list('pk', 'updated_at')
+        }
+        stale = [int(pk) for pk, updated_at in published.items()
+                 if manifest.get(pk) != updated_at]
+        removed = [int(pk) for pk in manifest if pk not in published]
+
+        for course_pk in removed:
+            remove_course(target, course_pk)
+
+        if stale and options['processes'] > 1:
+            # Close the connections inherited by forked workers; each worker
+            # opens its own connection on its first query.
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['processes'],
+                                     initializer=setup_worker) as executor:
+                results = list(executor.map(
+                    render_course, stale, [target] * len(stale)
+                ))
+        else:
+            results = [render_course(course_pk, target) for course_pk in stale]
+
+        pages = 0
+        for course_pk, result in zip(stale, results):
+            if result is None:
+                # The course was unpublished or deleted while rendering.
+                # Leave it out of the manifest, so that it isn't recorded
+                # as rendered.
+                del published[str(course_pk)]
+                removed.append(course_pk)
+            else:
+                pages += result
+
+        os.makedirs(target, exist_ok=True)
+        with open(manifest_path, 'w') as manifest_file:
+            json.dump(published, manifest_file)
+
+        self.stdout.write(
+            'Rendered {} page(s) for {} course(s); removed {} course(s).'.format(
+                pages, len(stale), len(removed)
+            )
+        )
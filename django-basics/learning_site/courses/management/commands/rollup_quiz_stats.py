@@ -0,0 +1,120 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Max, Q, Sum
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from courses import models
+
+
+def rollup_attempts(batch):
+    totals = list(batch.values('quiz_id').annotate(
+        attempts=Count('pk'), score_total=Sum('score')
+    ))
+    models.QuizStats.objects.bulk_create(
+        [models.QuizStats(quiz_id=row['quiz_id']) for row in totals],
+        ignore_conflicts=True
+    )
+    for row in totals:
+        models.QuizStats.objects.filter(pk=row['quiz_id']).update(
+            attempts=F('attempts') + row['attempts'],
+            score_total=F('score_total') + row['score_total'],
+        )
+
+
+def rollup_responses(batch):
+    totals = list(batch.values('question_id').annotate(
+        responses=Count('pk'), correct=Count('pk', filter=Q(correct=True))
+    ))
+    models.QuestionStats.objects.bulk_create(
+        [models.QuestionStats(question_id=row['question_id'])
+         for row in totals],
+        ignore_conflicts=True
+    )
+    for row in totals:
+        correct = F('correct') + row['correct']
+        responses = F('responses') + row['responses']
+        models.QuestionStats.objects.filter(pk=row['question_id']).update(
+            responses=responses,
+            correct=correct,
+            correct_rate=Cast(correct, FloatField()) / responses,
+        )
+
+    picks = list(batch.exclude(answer=None).values('answer_id').annotate(
+        picks=Count('pk')
+    ))
+    models.AnswerStats.objects.bulk_create(
+        [models.AnswerStats(answer_id=row['answer_id']) for row in picks],
+        ignore_conflicts=True
+    )
+    for row in picks:
+        models.AnswerStats.objects.filter(pk=row['answer_id']).update(
+            picks=F('picks') + row['picks']
+        )
+
+
+class Command(BaseCommand):
+    help = 'Folds new quiz attempts and responses into the quiz stats tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Number of log rows rolled up per transaction.',
+        )
+        parser.add_argument(
+            '--settle', type=int, default=60,
+            help=('Only roll up attempts that are at least this many seconds '
+                  'old, so that rows still being written are not skipped.'),
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options['settle'])
+        # Each log, with a filter for its rows that are newer than `cutoff`.
+        logs = (
+            ('attempts', rollup_attempts, models.QuizAttempt.objects.all(),
+             Q(created_at__gt=cutoff)),
+            ('responses', rollup_responses, models.QuizResponse.objects.all(),
+             Q(attempt__created_at__gt=cutoff)),
+        )
+        for name, rollup, log, unsettled in logs:
+            rows = self.rollup(name, rollup, log, unsettled,
+                               options['batch_size'])
+            self.stdout.write('Rolled up {} {}.'.format(rows, name))
+
+    def rollup(self, name, rollup, log, unsettled, batch_size):
+        """Applies `rollup` to the rows of `log` past the watermark in
+        primary key order, one batch per transaction. Stops before the first
+        row matching `unsettled`."""
+        models.RollupWatermark.objects.get_or_create(name=name)
+        rows = 0
+        while True:
+            with transaction.atomic():
+                # Lock the watermark so that concurrent runs can't roll up
+                # the same rows twice.
+                watermark = models.RollupWatermark.objects.select_for_update(
+                ).get(name=name)
+                pending = log.filter(pk__gt=watermark.last_id)
+                # Primary keys aren't always in `created_at` order, so end
+                # at the first unsettled row rather than skipping it: once
+                # the watermark has moved past a row, it is never rolled up.
+                first_unsettled = pending.filter(unsettled).order_by(
+                    'pk').values_list('pk', flat=True)[:1]
+                if first_unsettled:
+                    pending = pending.filter(pk__lt=first_unsettled[0])
+                # Find the primary key that ends this batch.
+                last_ids = list(pending.order_by('pk').values_list(
+                    'pk', flat=True)[batch_size - 1:batch_size])
+                if last_ids:
+                    last_id = last_ids[0]
+                else:
+                    last_id = pending.aggregate(Max('pk'))['pk__max']
+                if last_id is None:
+                    return rows
+
+                batch = pending.filter(pk__lte=last_id).order_by()
+                rows += batch.count()
+                rollup(batch)
+                watermark.last_id = last_id
+                watermark.save()
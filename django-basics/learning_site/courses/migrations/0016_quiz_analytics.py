@@ -0,0 +1,77 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('courses', '0015_course_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnswerStats',
+            fields=[
+                ('answer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='courses.answer')),
+                ('picks', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Answer stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='courses.question')),
+                ('responses', models.IntegerField(default=0)),
+                ('correct', models.IntegerField(default=0)),
+                ('correct_rate', models.FloatField(db_index=True, default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Question stats',
+                'ordering': ['correct_rate'],
+            },
+        ),
+        migrations.CreateModel(
+            name='QuizAttempt',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='courses.quiz')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuizStats',
+            fields=[
+                ('quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='courses.quiz')),
+                ('attempts', models.IntegerField(default=0)),
+                ('score_total', models.FloatField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Quiz stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('last_id', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuizResponse',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('correct', models.BooleanField(default=False)),
+                ('answer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='courses.answer')),
+                ('attempt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='responses', to='courses.quizattempt')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='courses.question')),
+            ],
+        ),
+    ]
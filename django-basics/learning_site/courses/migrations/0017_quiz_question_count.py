@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:24
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_questions(apps, schema_editor):
+    Quiz = apps.get_model('courses', 'Quiz')
+    Question = apps.get_model('courses', 'Question')
+    # Quizzes without questions get `NULL` from the subquery.
+    Quiz.objects.update(question_count=Coalesce(models.Subquery(
+        Question.objects.filter(
+            quiz=models.OuterRef('pk')
+        ).order_by().values('quiz').annotate(
+            count=models.Count('pk')
+        ).values('count')
+    ), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0016_quiz_analytics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='question_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_questions, migrations.RunPython.noop),
+    ]
@@ -15,6 +15,10 @@ class Course(models.Model):
     # Set value automatically to current time when a record is first created.
     # The current time is determined by the `TIME_ZONE` value in `settings.py`.
     created_at = models.DateTimeField(auto_now_add=True)
+    # Updated on every save, and bumped by `courses.signals` whenever one of
+    # the course's steps, questions, or answers changes. `prerender_courses`
+    # compares this value to decide which courses need to be re-rendered.
+    updated_at = models.DateTimeField(auto_now=True)
     title = models.CharField(max_length=255)
     description = models.TextField()
     teacher = models.ForeignKey(
@@ -41,6 +45,9 @@ class Course(models.Model):
 
 
 class Step(models.Model):
+    # Lets templates that render any kind of step tell quizzes apart.
+    is_quiz = False
+
     title = models.CharField(max_length=255)
     description = models.TextField()
     order = models.IntegerField(default=0)
@@ -73,12 +80,22 @@ class Text(Step):
 
 
 class Quiz(Step):
+    is_quiz = True
+
     total_questions = models.IntegerField(default=4)
     times_taken = models.IntegerField(default=0, editable=False)
+    # Number of `Question` rows in the quiz, kept in sync by `courses.signals`
+    # so that templates don't need a `COUNT` query per quiz.
+    question_count = models.IntegerField(default=0, editable=False)
 
     class Meta:
         verbose_name_plural = 'Quizzes'
 
+    @property
+    def missing_questions(self):
+        """How many more questions are needed to reach `total_questions`."""
+        return max(self.total_questions - self.question_count, 0)
+
     def get_absolute_url(self):
         return reverse('courses:quiz', kwargs={'course_pk': self.course_id, 'step_pk': self.id})
 
@@ -125,3 +142,117 @@ class Answer(models.Model):
 
     def __str__(self):
         return self.text
+
+
+# Quiz analytics: learners' attempts are appended to an attempt/response
+# log, and the `rollup_quiz_stats` management command folds new log rows
+# into the per-quiz, per-question, and per-answer stats tables below in
+# batches. Reports read the small stats tables instead of aggregating over
+# the (potentially very large) log on every request.
+class QuizAttempt(models.Model):
+    quiz = models.ForeignKey(
+        Quiz,
+        related_name='attempts',
+        on_delete=models.CASCADE
+    )
+    # Keep the attempt in the statistics even if the user is deleted.
+    user = models.ForeignKey(
+        User,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL
+    )
+    # Fraction of the quiz's questions that were answered correctly.
+    score = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return '{} on {}'.format(self.score, self.quiz)
+
+
+class QuizResponse(models.Model):
+    attempt = models.ForeignKey(
+        QuizAttempt,
+        related_name='responses',
+        on_delete=models.CASCADE
+    )
+    question = models.ForeignKey(
+        Question,
+        on_delete=models.CASCADE
+    )
+    # `None` if the learner skipped the question.
+    answer = models.ForeignKey(
+        Answer,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL
+    )
+    correct = models.BooleanField(default=False)
+
+
+class QuizStats(models.Model):
+    quiz = models.OneToOneField(
+        Quiz,
+        primary_key=True,
+        related_name='stats',
+        on_delete=models.CASCADE
+    )
+    attempts = models.IntegerField(default=0)
+    score_total = models.FloatField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'Quiz stats'
+
+    def __str__(self):
+        return str(self.quiz)
+
+    def average_score(self):
+        if not self.attempts:
+            return None
+        return self.score_total / self.attempts
+
+
+class QuestionStats(models.Model):
+    question = models.OneToOneField(
+        Question,
+        primary_key=True,
+        related_name='stats',
+        on_delete=models.CASCADE
+    )
+    responses = models.IntegerField(default=0)
+    correct = models.IntegerField(default=0)
+    # Stored (and indexed) rather than computed so that the hardest
+    # questions can be listed without scanning the table.
+    correct_rate = models.FloatField(default=0, db_index=True)
+
+    class Meta:
+        verbose_name_plural = 'Question stats'
+        ordering = ['correct_rate', ]
+
+    def __str__(self):
+        return str(self.question)
+
+
+class AnswerStats(models.Model):
+    answer = models.OneToOneField(
+        Answer,
+        primary_key=True,
+        related_name='stats',
+        on_delete=models.CASCADE
+    )
+    picks = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'Answer stats'
+
+    def __str__(self):
+        return str(self.answer)
+
+
+class RollupWatermark(models.Model):
+    """The primary key of the last log row that has been rolled up."""
+    name = models.CharField(max_length=50, primary_key=True)
+    last_id = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return '{}: {}'.format(self.name, self.last_id)
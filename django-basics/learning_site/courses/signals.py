@@ -0,0 +1,77 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import models
+
+
+# Each handler bumps `Course.updated_at` with a single UPDATE query rather
+# than loading and saving the course. `post_save` is only sent for the
+# concrete class being saved, so each question subclass is listed as well.
+@receiver(post_save, sender=models.Text)
+@receiver(post_save, sender=models.Quiz)
+@receiver(post_delete, sender=models.Text)
+@receiver(post_delete, sender=models.Quiz)
+def step_changed(sender, instance, **kwargs):
+    models.Course.objects.filter(
+        pk=instance.course_id
+    ).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=models.MultipleChoiceQuestion)
+@receiver(post_save, sender=models.TrueFalseQuestion)
+@receiver(post_save, sender=models.Question)
+@receiver(post_delete, sender=models.Question)
+def question_changed(sender, instance, **kwargs):
+    models.Course.objects.filter(
+        quiz__id=instance.quiz_id
+    ).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=models.Answer)
+@receiver(post_delete, sender=models.Answer)
+def answer_changed(sender, instance, **kwargs):
+    models.Course.objects.filter(
+        quiz__question__id=instance.question_id
+    ).update(updated_at=timezone.now())
+
+
+@receiver(pre_save, sender=models.MultipleChoiceQuestion)
+@receiver(pre_save, sender=models.TrueFalseQuestion)
+@receiver(pre_save, sender=models.Question)
+def remember_question_quiz(sender, instance, **kwargs):
+    # Look up the quiz the question belonged to before this save, so that a
+    # move to another quiz (e.g., through `QuestionAdmin.list_editable`)
+    # can update both quizzes' counts.
+    instance._previous_quiz_id = None
+    if instance.pk is not None:
+        instance._previous_quiz_id = models.Question.objects.filter(
+            pk=instance.pk
+        ).values_list('quiz_id', flat=True).first()
+
+
+@receiver(post_save, sender=models.MultipleChoiceQuestion)
+@receiver(post_save, sender=models.TrueFalseQuestion)
+@receiver(post_save, sender=models.Question)
+def count_saved_question(sender, instance, **kwargs):
+    previous_quiz_id = getattr(instance, '_previous_quiz_id', None)
+    if previous_quiz_id == instance.quiz_id:
+        return
+    if previous_quiz_id is not None:
+        models.Quiz.objects.filter(pk=previous_quiz_id).update(
+            question_count=F('question_count') - 1
+        )
+    models.Quiz.objects.filter(pk=instance.quiz_id).update(
+        question_count=F('question_count') + 1
+    )
+
+
+# Deleting a `MultipleChoiceQuestion` or `TrueFalseQuestion` also deletes
+# its parent `Question` row, so listening for `Question` alone counts each
+# deletion once, including bulk deletions from the admin.
+@receiver(post_delete, sender=models.Question)
+def count_deleted_question(sender, instance, **kwargs):
+    models.Quiz.objects.filter(pk=instance.quiz_id).update(
+        question_count=F('question_count') - 1
+    )
@@ -1,8 +1,23 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.http import Http404
 from django.urls import reverse
 from django.test import TestCase
 from django.utils import timezone
 
-from .models import Course, Step
+from . import views
+from .models import (
+    Answer, Course, MultipleChoiceQuestion, Question, Quiz, QuizAttempt,
+    QuestionStats, QuizStats, Step, Text, TrueFalseQuestion,
+)
 
 
 class CourseModelTests(TestCase):
@@ -72,3 +87,174 @@ class CourseViewsTests(TestCase):
                                'course_pk': self.course.pk, 'step_pk': self.step.pk}))
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(self.step, resp.context['step'])
+
+
+class PrerenderCoursesTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create(username="teacher")
+        self.course = Course.objects.create(
+            title="Python Testing",
+            description="Learn to write tests in Python",
+            teacher=self.teacher,
+            published=True
+        )
+        self.text = Text.objects.create(
+            title="Introduction to Doctests",
+            description="Learn to write tests in your docstrings.",
+            course=self.course
+        )
+        self.target = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.target)
+
+    def page_path(self, url):
+        return os.path.join(self.target, url.strip('/'), 'index.html')
+
+    def prerender(self):
+        call_command('prerender_courses', self.target, processes=1,
+                     stdout=StringIO())
+
+    def test_renders_course_and_steps(self):
+        self.prerender()
+        with open(self.page_path(reverse(
+                'courses:detail', kwargs={'pk': self.course.pk}))) as page:
+            self.assertIn(self.course.title, page.read())
+        self.assertTrue(os.path.exists(self.page_path(
+            self.text.get_absolute_url())))
+
+    def test_only_changed_courses_are_rerendered(self):
+        self.prerender()
+        path = self.page_path(self.text.get_absolute_url())
+        os.remove(path)
+        self.prerender()
+        self.assertFalse(os.path.exists(path))
+
+        # Saving a step bumps the course's `updated_at`.
+        self.text.save()
+        self.prerender()
+        self.assertTrue(os.path.exists(path))
+
+    def test_unpublished_course_is_removed(self):
+        self.prerender()
+        self.course.published = False
+        self.course.save()
+        self.prerender()
+        self.assertFalse(os.path.exists(self.page_path(
+            self.text.get_absolute_url())))
+
+    def test_pages_that_fail_to_render_are_not_written(self):
+        # The course is unpublished after the command has listed it.
+        with mock.patch.object(views, 'course_detail', side_effect=Http404):
+            self.prerender()
+        self.assertFalse(os.path.exists(self.page_path(reverse(
+            'courses:detail', kwargs={'pk': self.course.pk}))))
+        with open(os.path.join(self.target, '.prerender.json')) as manifest:
+            self.assertNotIn(str(self.course.pk), json.load(manifest))
+
+
+class QuizStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="learner")
+        self.course = Course.objects.create(
+            title="Python Testing",
+            description="Learn to write tests in Python",
+            teacher=self.user,
+            published=True
+        )
+        self.quiz = Quiz.objects.create(
+            title="Doctests Quiz",
+            description="Check your doctest knowledge.",
+            course=self.course
+        )
+        self.question = MultipleChoiceQuestion.objects.create(
+            quiz=self.quiz,
+            prompt="Where do doctests live?"
+        )
+        self.right = Answer.objects.create(
+            question=self.question, text="Docstrings", correct=True)
+        self.wrong = Answer.objects.create(
+            question=self.question, text="Comments")
+
+    def take_quiz(self, answer):
+        self.client.force_login(self.user)
+        return self.client.post(
+            reverse('courses:take_quiz', kwargs={
+                'course_pk': self.course.pk, 'quiz_pk': self.quiz.pk}),
+            {'question_{}'.format(self.question.pk): answer.pk}
+        )
+
+    def test_rollup(self):
+        self.take_quiz(self.right)
+        self.take_quiz(self.wrong)
+        self.take_quiz(self.wrong)
+        call_command('rollup_quiz_stats', settle=0, batch_size=2,
+                     stdout=StringIO())
+        # Running again must not count the same attempts twice.
+        call_command('rollup_quiz_stats', settle=0, stdout=StringIO())
+
+        quiz_stats = QuizStats.objects.get(quiz=self.quiz)
+        self.assertEqual(quiz_stats.attempts, 3)
+        self.assertAlmostEqual(quiz_stats.average_score(), 1 / 3)
+        question_stats = QuestionStats.objects.get(question=self.question)
+        self.assertEqual(question_stats.responses, 3)
+        self.assertAlmostEqual(question_stats.correct_rate, 1 / 3)
+        self.assertEqual(self.wrong.stats.picks, 2)
+
+    def test_rollup_waits_for_unsettled_rows(self):
+        self.take_quiz(self.right)
+        self.take_quiz(self.wrong)
+        # The first attempt is still settling, so neither may be rolled up
+        # yet, even though the second one is old enough.
+        first, second = QuizAttempt.objects.order_by('pk')
+        QuizAttempt.objects.filter(pk=second.pk).update(
+            created_at=timezone.now() - timedelta(hours=1))
+        call_command('rollup_quiz_stats', settle=60, stdout=StringIO())
+        self.assertFalse(QuizStats.objects.filter(quiz=self.quiz).exists())
+
+        QuizAttempt.objects.filter(pk=first.pk).update(
+            created_at=timezone.now() - timedelta(hours=1))
+        call_command('rollup_quiz_stats', settle=60, stdout=StringIO())
+        self.assertEqual(QuizStats.objects.get(quiz=self.quiz).attempts, 2)
+
+
+class QuestionCountTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(
+            title="Python Testing",
+            description="Learn to write tests in Python",
+            teacher=User.objects.create(username="teacher")
+        )
+        self.quiz = Quiz.objects.create(
+            title="Doctests Quiz", description="", course=self.course)
+        self.other_quiz = Quiz.objects.create(
+            title="Unittest Quiz", description="", course=self.course)
+
+    def assertCounts(self, quiz_count, other_quiz_count):
+        self.quiz.refresh_from_db()
+        self.other_quiz.refresh_from_db()
+        self.assertEqual(self.quiz.question_count, quiz_count)
+        self.assertEqual(self.other_quiz.question_count, other_quiz_count)
+
+    def test_count_follows_questions(self):
+        question = MultipleChoiceQuestion.objects.create(
+            quiz=self.quiz, prompt="Where do doctests live?")
+        TrueFalseQuestion.objects.create(
+            quiz=self.quiz, prompt="Doctests are run by unittest.")
+        self.assertCounts(2, 0)
+
+        # Moving a question, as `QuestionAdmin.list_editable` does.
+        question.quiz = self.other_quiz
+        question.save()
+        self.assertCounts(1, 1)
+
+        question.delete()
+        self.assertCounts(1, 0)
+
+        Question.objects.all().delete()
+        self.assertCounts(0, 0)
+
+    def test_missing_questions(self):
+        self.assertEqual(self.quiz.missing_questions, 4)
+        TrueFalseQuestion.objects.create(
+            quiz=self.quiz, prompt="Doctests are run by unittest.")
+        self.quiz.refresh_from_db()
+        self.assertEqual(self.quiz.missing_questions, 3)
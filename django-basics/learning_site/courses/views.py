@@ -3,7 +3,8 @@ from itertools import chain
 from django.contrib import messages
 # Marks a view as requiring a logged-in user.
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q, Count, Sum
+from django.db import transaction
+from django.db.models import F, Q, Count, Sum
 from django.http import HttpResponseRedirect, Http404
 from django.shortcuts import get_object_or_404, render
 
@@ -36,9 +37,10 @@ def course_detail(request, pk):
     try:
         # `prefetch_related` will fetch everything in the `quiz_set` and the
         # `text_set` and assign them to the items in the resulting queryset.
-        # Generates 4 SQL queries (courses, quiz sets, text sets, question sets).
+        # Generates 3 SQL queries (courses, quiz sets, text sets). Questions
+        # don't need to be fetched because quizzes store `question_count`.
         course = models.Course.objects.prefetch_related(
-            'quiz_set', 'text_set', 'quiz_set__question_set'
+            'quiz_set', 'text_set'
         ).get(pk=pk, published=True)
     except models.Course.DoesNotExist:
         raise Http404
@@ -80,6 +82,60 @@ def quiz_detail(request, course_pk, step_pk):
         return render(request, 'courses/step_detail.html', {'step': step})
 
 
+@login_required
+def quiz_take(request, course_pk, quiz_pk):
+    quiz = get_object_or_404(models.Quiz,
+                             pk=quiz_pk,
+                             course_id=course_pk,
+                             course__published=True)
+    if request.method != 'POST':
+        return HttpResponseRedirect(quiz.get_absolute_url())
+
+    # Each question's radio buttons are named `question_<pk>`, and the
+    # submitted value is the primary key of the chosen answer.
+    question_pks = list(quiz.question_set.values_list('pk', flat=True))
+    picked = {}
+    for question_pk in question_pks:
+        value = request.POST.get('question_{}'.format(question_pk), '')
+        if value.isdigit():
+            picked[question_pk] = int(value)
+    answers = {
+        answer['pk']: answer for answer in models.Answer.objects.filter(
+            question__quiz=quiz, pk__in=picked.values()
+        ).values('pk', 'question_id', 'correct')
+    }
+
+    responses = []
+    for question_pk in question_pks:
+        answer = answers.get(picked.get(question_pk))
+        # Ignore answers that belong to a different question.
+        if answer is not None and answer['question_id'] != question_pk:
+            answer = None
+        responses.append(models.QuizResponse(
+            question_id=question_pk,
+            answer_id=answer and answer['pk'],
+            correct=bool(answer and answer['correct']),
+        ))
+    total_correct = sum(response.correct for response in responses)
+
+    with transaction.atomic():
+        attempt = models.QuizAttempt.objects.create(
+            quiz=quiz,
+            user=request.user,
+            score=total_correct / len(responses) if responses else 0,
+        )
+        for response in responses:
+            response.attempt = attempt
+        models.QuizResponse.objects.bulk_create(responses)
+        models.Quiz.objects.filter(pk=quiz.pk).update(
+            times_taken=F('times_taken') + 1
+        )
+
+    messages.success(request, 'You answered {} of {} questions correctly.'.format(
+        total_correct, len(responses)))
+    return HttpResponseRedirect(quiz.get_absolute_url())
+
+
 @login_required
 def quiz_create(request, course_pk):
     course = get_object_or_404(
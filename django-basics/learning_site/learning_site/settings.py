@@ -42,7 +42,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'django.contrib.humanize',
     'debug_toolbar',
-    'courses',
+    'courses.apps.CoursesConfig',
 ]
 
 MIDDLEWARE = [